@@ -1,7 +1,170 @@
+import functools
+import inspect
+import math
+import types
+import warnings
 import numpy as np
-from autodiffcc.core import AD
+from autodiffcc.core import AD, implements
+from autodiffcc.dual import Dual
+from autodiffcc.reverse import Node
+from autodiffcc.hyperdual import HyperDual
 
+# the math module under numpy's names, so that one kernel serves Dual numbers and arrays
+_MATH = types.SimpleNamespace(sin=math.sin, cos=math.cos, tan=math.tan, exp=math.exp, sqrt=math.sqrt,
+                              arcsin=math.asin, arccos=math.acos, arctan=math.atan, sinh=math.sinh,
+                              cosh=math.cosh, tanh=math.tanh, log=math.log,
+                              where=lambda condition, x, y: x if condition else y)
 
+# maps the name of each elementary function to its numpy function and its kernel
+_PRIMITIVES = {}
+
+
+def _primitive(name, function):
+    """Returns a decorator that registers a kernel for the elementary function name
+
+    INPUTS
+    =======
+    name: the name of the elementary function
+    function: evaluates the elementary function on plain scalars and arrays
+
+    RETURNS
+    ========
+    a decorator that adds the kernel to the registry and returns it unchanged
+
+    NOTES
+    =====
+    A kernel takes a value x, a module lib (numpy or _MATH) and a flag second, and
+    returns f(x) and f'(x), followed by f''(x) when second is True. Intermediates
+    shared by the value and its derivatives are computed once.
+    """
+    def decorator(kernel):
+        _PRIMITIVES[name] = (function, kernel)
+        return kernel
+    return decorator
+
+
+def _apply(name, obj):
+    """Returns the elementary function name evaluated on obj
+
+    INPUTS
+    =======
+    name: the name of a registered elementary function
+    obj: Dual, AD, Node or HyperDual object, scalar, or vector
+
+    RETURNS
+    ========
+    the same kind of object as obj, with its derivatives propagated by the chain rule
+    """
+    function, kernel = _PRIMITIVES[name]
+    if isinstance(obj, Dual):
+        return obj._chain(*kernel(obj.val, _MATH))
+    if isinstance(obj, AD):
+        val, der = kernel(obj.val, np)
+        return AD._new(val, der * obj.der)
+    if isinstance(obj, Node):
+        return obj._chain(*kernel(obj.val, np))
+    if isinstance(obj, HyperDual):
+        return obj._chain(*kernel(obj.val, np, second=True))
+    return function(obj)
+
+
+def _any(condition):
+    """Returns True if condition holds anywhere, for a bool or a numpy array of bools"""
+    return condition is True or (condition is not False and condition.any())
+
+
+@_primitive('cos', np.cos)
+def _cos(x, lib, second=False):
+    val = lib.cos(x)
+    der = -lib.sin(x)
+    return (val, der, -val) if second else (val, der)
+
+
+@_primitive('sin', np.sin)
+def _sin(x, lib, second=False):
+    val = lib.sin(x)
+    der = lib.cos(x)
+    return (val, der, -val) if second else (val, der)
+
+
+@_primitive('tan', np.tan)
+def _tan(x, lib, second=False):
+    val = lib.tan(x)
+    der = 1 + val * val
+    return (val, der, 2 * val * der) if second else (val, der)
+
+
+@_primitive('exp', np.exp)
+def _exp(x, lib, second=False):
+    val = lib.exp(x)
+    return (val, val, val) if second else (val, val)
+
+
+@_primitive('sqrt', np.sqrt)
+def _sqrt(x, lib, second=False):
+    val = lib.sqrt(x)
+    der = 0.5 / val
+    return (val, der, -0.5 * der / x) if second else (val, der)
+
+
+@_primitive('arcsin', np.arcsin)
+def _arcsin(x, lib, second=False):
+    der = 1 / lib.sqrt(1 - x * x)
+    return (lib.arcsin(x), der, x * der ** 3) if second else (lib.arcsin(x), der)
+
+
+@_primitive('arccos', np.arccos)
+def _arccos(x, lib, second=False):
+    # this is the negative of the derivative of the arcsin
+    der = -1 / lib.sqrt(1 - x * x)
+    return (lib.arccos(x), der, x * der ** 3) if second else (lib.arccos(x), der)
+
+
+@_primitive('arctan', np.arctan)
+def _arctan(x, lib, second=False):
+    der = 1 / (x * x + 1)
+    return (lib.arctan(x), der, -2 * x * der * der) if second else (lib.arctan(x), der)
+
+
+@_primitive('sinh', np.sinh)
+def _sinh(x, lib, second=False):
+    val = lib.sinh(x)
+    der = lib.cosh(x)
+    return (val, der, val) if second else (val, der)
+
+
+@_primitive('cosh', np.cosh)
+def _cosh(x, lib, second=False):
+    val = lib.cosh(x)
+    der = lib.sinh(x)
+    return (val, der, val) if second else (val, der)
+
+
+@_primitive('tanh', np.tanh)
+def _tanh(x, lib, second=False):
+    # the derivative of tanh is sech^2(x) = 1 - tanh^2(x)
+    val = lib.tanh(x)
+    der = 1 - val * val
+    return (val, der, -2 * val * der) if second else (val, der)
+
+
+@_primitive('logistic', lambda obj: 1 / (1 + np.exp(-obj)))
+def _logistic(x, lib, second=False):
+    # exp is only taken of non-positive numbers so that it cannot overflow
+    e = lib.exp(-abs(x))
+    q = 1 / (1 + e)
+    val = lib.where(x >= 0, q, e * q)
+    der = e * q * q
+    return (val, der, der * (1 - 2 * val)) if second else (val, der)
+
+
+@_primitive('log', np.log)
+def _log(x, lib, second=False):
+    der = 1 / x
+    return (lib.log(x), der, -der * der) if second else (lib.log(x), der)
+
+
+@implements(np.cos, ufunc=True)
 def cos(obj):
     """Returns the cos of a scalar or an AD object 
 
@@ -17,13 +180,12 @@ def cos(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> cos(x)
-    (array(-0.9899924966004454), array(-0.1411200080598672))
+    (-0.9899924966004454, -0.1411200080598672)
     """
-    if isinstance(obj, AD):
-        return AD(val=np.cos(obj.val), der=-np.sin(obj.val) * obj.der)
-    return np.cos(obj)
+    return _apply('cos', obj)
 
 
+@implements(np.sin, ufunc=True)
 def sin(obj):
     """Returns the sin of a scalar or an AD object 
 
@@ -39,13 +201,12 @@ def sin(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> sin(x)
-    (array(0.1411200080598672), array(-0.9899924966004454))
+    (0.1411200080598672, -0.9899924966004454)
     """
-    if isinstance(obj, AD):
-        return AD(val=np.sin(obj.val), der=np.cos(obj.val) * obj.der)
-    return np.sin(obj)
+    return _apply('sin', obj)
 
 
+@implements(np.tan, ufunc=True)
 def tan(obj):
     """Returns the tan of a scalar or an AD object 
 
@@ -61,13 +222,12 @@ def tan(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> tan(x)
-    (array(-0.1425465430742778), array(1.020319516942427))
+    (-0.1425465430742778, 1.0203195169424268)
     """
-    if isinstance(obj, AD):
-        return AD(val=np.tan(obj.val), der=(1 / (np.cos(obj.val) ** 2)) * obj.der)
-    return np.tan(obj)
+    return _apply('tan', obj)
 
 
+@implements(np.exp, ufunc=True)
 def exp(obj):
     """Returns the exp of a scalar or an AD object 
 
@@ -83,13 +243,12 @@ def exp(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> exp(x)
-    (array(20.085536923187668), array(20.085536923187668))
+    (20.085536923187668, 20.085536923187668)
     """
-    if isinstance(obj, AD):
-        return AD(val=np.exp(obj.val), der=np.exp(obj.val) * obj.der)
-    return np.exp(obj)
+    return _apply('exp', obj)
 
 
+@implements(np.sqrt, ufunc=True)
 def sqrt(obj):
     """Returns the sqrt of a scalar or an AD object 
 
@@ -105,19 +264,15 @@ def sqrt(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> sqrt(x)
-    (array(1.7320508075688772), array(0.28867513459481287))
+    (1.7320508075688772, 0.2886751345948129)
     """
-    if isinstance(obj, AD):
-        val = obj.val
-        if (val <= 0).any():
-            raise TypeError('Sqrt has a positive domain, input negative')
-        else:
-            return obj.__pow__(0.5)
-    if (np.array(obj) <= 0).any():
+    values = obj.val if isinstance(obj, (Dual, AD, Node, HyperDual)) else np.array(obj)
+    if _any(values <= 0):
         raise TypeError('Sqrt has a positive domain, input negative')
-    return np.sqrt(obj)
+    return _apply('sqrt', obj)
 
 
+@implements(np.arcsin, ufunc=True)
 def arcsin(obj):
     """Returns the arcsin of a scalar or an AD object 
 
@@ -133,22 +288,18 @@ def arcsin(obj):
     =========
     >>> x = AD(val=0.5, der=1)
     >>> print(arcsin(x))
-    (array(0.52359878), array(1.15470054))
+    (0.5235987755982989, 1.1547005383792517)
     """
-    if isinstance(obj, AD):
-        values = obj.val
-        if (values < (-1) or values > (1)).any():
-            raise ValueError('Values are not in the domain of arcsin [-1, 1].')
-
-        val = np.arcsin(obj.val)
-        der = 1 / np.sqrt(1 - (obj.val ** 2) * obj.der)
-
-        return AD(val=val, der=der)
-    if (np.array(obj) < -1 or np.array(obj) > 1).any():
+    values = obj.val if isinstance(obj, (Dual, AD, Node, HyperDual)) else np.array(obj)
+    if _any((values < -1) | (values > 1)):
         raise ValueError('Values are not in the domain of arcsin [-1, 1].')
-    return np.arcsin(obj)
+    if isinstance(obj, Dual) and abs(obj.val) == 1:
+        # the derivative is infinite at the ends of the domain
+        return arcsin(obj._to_ad())
+    return _apply('arcsin', obj)
 
 
+@implements(np.arccos, ufunc=True)
 def arccos(obj):
     """Returns the arccos of a scalar or an AD object 
 
@@ -164,23 +315,18 @@ def arccos(obj):
     =========
     >>> x = AD(val=0.5, der=1)
     >>> print(arccos(x))
-    (array(1.04719755), array(-1.15470054))
+    (1.0471975511965976, -1.1547005383792517)
     """
-    if isinstance(obj, AD):
-        values = obj.val
-        if (values < (-1) or values > (1)).any():
-            raise ValueError('Values are not in the domain of arcsin [-1, 1].')
-
-        val = np.arccos(obj.val)
-        # this is the negative of the derivative of the arcsin 
-        der = -1 * (1 / np.sqrt(1 - (obj.val ** 2) * obj.der))
-        return AD(val=val, der=der)
-
-    if (np.array(obj) < -1 or np.array(obj) > 1).any():
+    values = obj.val if isinstance(obj, (Dual, AD, Node, HyperDual)) else np.array(obj)
+    if _any((values < -1) | (values > 1)):
         raise ValueError('Values are not in the domain of arcsin [-1, 1].')
-    return np.arccos(obj)
+    if isinstance(obj, Dual) and abs(obj.val) == 1:
+        # the derivative is infinite at the ends of the domain
+        return arccos(obj._to_ad())
+    return _apply('arccos', obj)
 
 
+@implements(np.arctan, ufunc=True)
 def arctan(obj):
     """Returns the arctan of a scalar or an AD object 
 
@@ -196,15 +342,12 @@ def arctan(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> arctan(x)
-    (array(1.24904577), array(0.1))
+    (1.2490457723982544, 0.1)
     """
-    if isinstance(obj, AD):
-        val = np.arctan(obj.val)
-        der = 1 / ((obj.val ** 2) + 1) * obj.der
-        return AD(val=val, der=der)
-    return np.arctan(obj)
+    return _apply('arctan', obj)
 
 
+@implements(np.sinh, ufunc=True)
 def sinh(obj):
     """Returns the sinh of a scalar or an AD object 
 
@@ -220,16 +363,13 @@ def sinh(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> sinh(x)
-    (array(10.01787493), array(10.067662))
+    (10.017874927409903, 10.067661995777764)
     
     """
-    if isinstance(obj, AD):
-        val = np.sinh(obj.val)
-        der = np.cosh(obj.val) * obj.der
-        return AD(val=val, der=der)
-    return np.sinh(obj)
+    return _apply('sinh', obj)
 
 
+@implements(np.cosh, ufunc=True)
 def cosh(obj):
     """Returns the cosh of a scalar or an AD object 
 
@@ -245,15 +385,12 @@ def cosh(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> cosh(x)
-    (array(10.067662), array(10.01787493))
+    (10.067661995777764, 10.017874927409903)
     """
-    if isinstance(obj, AD):
-        val = np.cosh(obj.val)
-        der = np.sinh(obj.val) * obj.der
-        return AD(val=val, der=der)
-    return np.cosh(obj)
+    return _apply('cosh', obj)
 
 
+@implements(np.tanh, ufunc=True)
 def tanh(obj):
     """Returns the tanh of a scalar or an AD object 
 
@@ -269,14 +406,9 @@ def tanh(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> tanh(x)
-    (array(0.99505475), array(0.00986604))
+    (0.9950547536867305, 0.009866037165440211)
     """
-    # the derivative of tanh is sech^2(x) and sech(x) can be defined as 1/cosh(x)
-    if isinstance(obj, AD):
-        val = np.tanh(obj.val)
-        der = ((1 / np.cosh(obj.val)) ** 2) * obj.der
-        return AD(val=val, der=der)
-    return np.tanh(obj)
+    return _apply('tanh', obj)
 
 
 def logistic(obj):
@@ -294,15 +426,12 @@ def logistic(obj):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> logistic(x)
-    (array(0.95257413), array(0.04517666))
+    (array(0.95257413), 0.04517665973091214)
     """
-    if isinstance(obj, AD):
-        val = (1 / (1 + np.exp(-obj.val)))
-        der = ((np.exp(-obj.val)) / (1 + np.exp(-obj.val)) ** 2) * obj.der
-        return AD(val=val, der=der)
-    return 1 / (1 + np.exp(-obj))
+    return _apply('logistic', obj)
 
 
+@implements(np.log, ufunc=True)
 def log(obj, base=None):
     """Returns the log of a scalar, vector, or an AD object with any base
 
@@ -319,18 +448,98 @@ def log(obj, base=None):
     =========
     >>> x = AD(val = 3, der = 1)
     >>> log(x)
-    (array(0.47712125), array(0.14476483))
+    (1.0986122886681096, 0.3333333333333333)
     """
-    if not base:
-        base = np.exp(1)
+    values = obj.val if isinstance(obj, (Dual, AD, Node, HyperDual)) else np.array(obj)
+    if _any(values <= 0):
+        raise ValueError('Log accepts only positive numbers')
+    result = _apply('log', obj)
+    if base:
+        return result / np.log(base)
+    return result
 
-    if isinstance(obj, AD):
-        if obj <= 0:
-            raise ValueError('Log accepts only positive numbers')
-        val = np.log(obj.val) / np.log(base)
-        der = (1 / (obj.val * np.log(base))) * obj.der
-        return AD(val=val, der=der)
 
-    if obj <= 0:
-        raise ValueError('Log accepts only positive numbers')
-    return np.log(obj) / np.log(base)
+implements(np.log2, ufunc=True)(lambda obj: log(obj, 2))
+implements(np.log10, ufunc=True)(lambda obj: log(obj, 10))
+
+
+def primitive(derivative, name=None, latex=None):
+    """Returns a decorator that registers a function as a single primitive with its
+    own derivative rule
+
+    INPUTS
+    =======
+    derivative: a function of the same arguments returning the partial derivative,
+        or a tuple with one partial derivative per argument for several arguments
+    name: the name of the function in Equation expressions, defaults to its __name__
+    latex: the LaTeX format of the function, defaults to name applied to its arguments
+
+    RETURNS
+    ========
+    a decorator that returns a function evaluating the decorated function on Dual,
+        AD and Node objects, scalars and vectors, and adds it to the Equation
+        function table
+
+    NOTES
+    =====
+    The decorated function only ever sees plain values, and the derivative of its
+    result is the sum of each partial derivative times the derivative of its
+    argument, so an expensive sub-model becomes one operation instead of one per
+    intermediate. HyperDual numbers are not supported as no second derivative is given.
+    A name already in the Equation function table, such as sin, is replaced with a warning
+    once the table is loaded by the first expression.
+
+    EXAMPLES
+    =========
+    >>> @primitive(derivative=lambda x: 2 * x)
+    ... def square(x):
+    ...     return x * x
+    >>> square(AD(3, n_vars=1, idx=0))
+    (array(9.), array([6.]))
+    """
+    def decorator(func):
+        fn_name = name or func.__name__
+
+        @functools.wraps(func)
+        def evaluate(*args):
+            if any(isinstance(arg, HyperDual) for arg in args):
+                raise TypeError(f'{fn_name} has no second derivative to evaluate HyperDual numbers')
+            if any(isinstance(arg, AD) for arg in args):
+                args = [arg._to_ad() if isinstance(arg, Dual) else arg for arg in args]
+            values = [arg.val if isinstance(arg, (Dual, AD, Node)) else arg for arg in args]
+            val = func(*values)
+            variables = [i for i, arg in enumerate(args) if isinstance(arg, (Dual, AD, Node))]
+            if not variables:
+                return val
+
+            partials = derivative(*values)
+            if len(args) == 1:
+                partials = (partials,)
+            first = args[variables[0]]
+            if isinstance(first, Dual):
+                der = [0.0] * len(first.der)
+                for i in variables:
+                    der = [d + partials[i] * d_arg for d, d_arg in zip(der, args[i].der)]
+                return Dual._new(float(val), tuple(float(d) for d in der))
+            if isinstance(first, AD):
+                # a float array like the values of the other primitives, which func need not return
+                return AD._new(np.asarray(val, dtype=float), sum(partials[i] * args[i].der for i in variables))
+            return Node(val, first.tape, tuple((args[i], partials[i]) for i in variables))
+
+        # registers the primitive with Equation so that expressions can call it by name
+        from autodiffcc.Equation.core import extend, functions
+        from autodiffcc.Equation.util import addFn
+
+        n_args = len(inspect.signature(func).parameters)
+
+        def register():
+            if fn_name in functions:
+                warnings.warn(f"{fn_name} replaces the function of the same name in Equation expressions, "
+                              f"pass name to register it under another name")
+            addFn(fn_name, fn_name + "({0:s})", latex or "\\operatorname{{" + fn_name + "}}\\left({0:s}\\right)",
+                  [n_args], evaluate)
+
+        # queued until the plugins are loaded by the first expression, so that they can't replace it
+        extend(register)
+        return evaluate
+    return decorator
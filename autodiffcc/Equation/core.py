@@ -14,6 +14,7 @@ from __future__ import print_function
 import math
 
 import sys
+import threading
 import re
 
 if sys.version_info >= (3,):
@@ -205,13 +206,16 @@ class Expression( object ):
             self.__vars = dict(expression.__vars) # intenral array of preset variables
             self.__argsused = set(expression.__argsused)
             self.__expr = list(expression.__expr)
+            self.__function = expression.__function # shared with the original, as it depends only on the tokens and argorder
             self.variables = {} # call variables
         else:
+            load()
             self.__expression = expression
-            self.__args = argorder;
+            self.__args = list(argorder)
             self.__vars = {} # intenral array of preset variables
             self.__argsused = set()
             self.__expr = [] # compiled equation tokens
+            self.__function = [None] # holds the generated python function, built on first call
             self.variables = {} # call variables
             self.__compile()
             del self.__expression
@@ -274,9 +278,16 @@ class Expression( object ):
         """
         if len(self.__expr) == 0:
             return None
-        self.variables = {}
-        self.variables.update(constants) # i.e. pi, e, i, etc.
-        self.variables.update(self.__vars)
+        function = self.__function[0]
+        if function is None:
+            function = self.__function[0] = self.__generate(self.__args,{})
+        if not kwargs and len(args) == len(self.__args):
+            # every variable is given positionally, so none is looked up
+            return function(*args)
+        # a local dict, so that threads sharing this Expression do not see each other's variables
+        variables = {}
+        variables.update(constants) # i.e. pi, e, i, etc.
+        variables.update(self.__vars)
         if len(args) > len(self.__args):
             raise TypeError("<{0:s}.{1:s}({2:s}) object at {3:0=#10x}>() takes at most {4:d} arguments ({5:d} given)".format(
                     type(self).__module__,type(self).__name__,repr(self),id(self),len(self.__args),len(args)))
@@ -285,23 +296,108 @@ class Expression( object ):
                 if self.__args[i] in kwargs:
                     raise TypeError("<{0:s}.{1:s}({2:s}) object at {3:0=#10x}>() got multiple values for keyword argument '{4:s}'".format(
                         type(self).__module__,type(self).__name__,repr(self),id(self),self.__args[i]))
-                self.variables[self.__args[i]] = args[i]
-        self.variables.update(kwargs)
+                variables[self.__args[i]] = args[i]
+        variables.update(kwargs)
         for arg in self.__argsused:
-            if arg not in self.variables:
+            if arg not in variables:
                 min_args = len(self.__argsused - (set(self.__vars.keys()) | set(constants.keys())))
                 raise TypeError("<{0:s}.{1:s}({2:s}) object at {3:0=#10x}>() takes at least {4:d} arguments ({5:d} given) '{6:s}' not defined".format(
                     type(self).__module__,type(self).__name__,repr(self),id(self),min_args,len(args)+len(kwargs),arg))
-        expr = self.__expr[::-1]
-        args = [];
-        while len(expr) > 0:
-            t = expr.pop()
-            r = t(args,self)
-            args.append(r)
-        if len(args) > 1:
-            return args
+        self.variables = variables
+        return function(*[variables.get(name, 0) for name in self.__args]) # Default variables to 0
+
+    def bind(self,argorder=None):
+        """fn.bind(argorder)
+
+        Bind the variables of the Expression to positional slots
+
+        Variables named in `argorder` become the positional arguments of the
+        returned function, in that order. Every other variable is resolved once,
+        here, to its preset value or else to its constant, so a call only passes
+        its arguments on, without building a dict of variables or checking them.
+        Later changes to the preset variables or constants don't affect the
+        returned function.
+
+            >>> fn = Expression("a * x + c")
+            >>> fn["a"] = 2
+            >>> f = fn.bind(["x"])
+            >>> f(3)
+            299792464.0
+
+        Parameters
+        ----------
+        argorder: list of str
+            List of variable names, indicating the position of variable,
+            defaults to the argorder of the Expression
+
+        Returns
+        -------
+        function
+            Function of the variables in argorder returning the value of the
+            Expression, or a list of values if it leaves several on the stack
+        """
+        if argorder is None:
+            argorder = self.__args
+        argorder = list(argorder)
+        if len(set(argorder)) != len(argorder):
+            raise ValueError("Duplicate variable names in argorder {0:s}".format(repr(argorder)))
+        values = {}
+        for arg in self.__argsused:
+            if arg in argorder:
+                continue
+            elif arg in self.__vars:
+                values[arg] = self.__vars[arg]
+            elif arg in constants:
+                values[arg] = constants[arg]
+            else:
+                raise TypeError("<{0:s}.{1:s}({2:s}) object at {3:0=#10x}>.bind() '{4:s}' not defined, it must be in argorder, preset or a constant".format(
+                    type(self).__module__,type(self).__name__,repr(self),id(self),arg))
+        return self.__generate(argorder,values)
+
+    def __generate(self,argorder,values):
+        """Generate a Python function from the RPN tokens
+
+        The function takes the variables in argorder as positional arguments and
+        evaluates the tokens as straight line code, with one local per token and
+        direct calls to the operator and function callables, so calling it costs
+        about what a hand written lambda costs. Other variables take their value
+        from values, defaulting to 0.
+
+        Returns
+        -------
+        function
+            Function of the variables in argorder returning the value of the
+            Expression, or a list of values if it leaves several on the stack
+        """
+        params = dict((name, "a{0:d}".format(i)) for i, name in enumerate(argorder))
+        namespace = {}
+        lines = []
+        stack = []
+        for i, t in enumerate(self.__expr):
+            if isinstance(t, ExpressionVariable):
+                if t.name in params:
+                    stack.append(params[t.name])
+                else:
+                    namespace["c{0:d}".format(i)] = values.get(t.name, 0)
+                    stack.append("c{0:d}".format(i))
+            elif isinstance(t, ExpressionValue):
+                namespace["c{0:d}".format(i)] = t.value
+                stack.append("c{0:d}".format(i))
+            else:
+                namespace["f{0:d}".format(i)] = t.function
+                operands = stack[len(stack) - t.nargs:]
+                del stack[len(stack) - t.nargs:]
+                lines.append("    t{0:d} = f{0:d}({1:s})".format(i, ", ".join(operands)))
+                stack.append("t{0:d}".format(i))
+        if len(stack) > 1:
+            lines.append("    return [{0:s}]".format(", ".join(stack)))
+        elif len(stack) == 1:
+            lines.append("    return {0:s}".format(stack[0]))
         else:
-            return args[0]
+            lines.append("    return None")
+        source = "def expression({0:s}):\n{1:s}\n".format(", ".join(params[name] for name in argorder), "\n".join(lines))
+        exec(compile(source, "<Expression>", "exec"), namespace)
+        return namespace["expression"]
 
     def __next(self,__expect_op):
         if __expect_op:
@@ -437,6 +533,7 @@ class Expression( object ):
             return NotImplemented
         else:
             obj = type(self)(self)
+            obj.__function = [None]
             if isinstance(other,(int,float,complex)):
                 obj.__expr.append(ExpressionValue(other))
             else:
@@ -464,6 +561,7 @@ class Expression( object ):
             return NotImplemented
         else:
             obj = type(self)(self)
+            obj.__function = [None]
             if isinstance(other,(int,float,complex)):
                 obj.__expr.insert(0,ExpressionValue(other))
             else:
@@ -493,6 +591,7 @@ class Expression( object ):
             return NotImplemented
         else:
             obj = self
+            obj.__function = [None]
             if isinstance(other,(int,float,complex)):
                 obj.__expr.append(ExpressionValue(other))
             else:
@@ -518,6 +617,7 @@ class Expression( object ):
     def __apply(self,op):
         fn = unary_ops[op]
         obj = type(self)(self)
+        obj.__function = [None]
         obj.__expr.append(ExpressionFunction(fn['func'],1,fn['str'],fn['latex'],op,False))
         return obj
 
@@ -526,6 +626,7 @@ class Expression( object ):
         if 1 not in fn['args'] or '*' not in fn['args']:
             raise RuntimeError("Can't Apply {0:s} function, dosen't accept only 1 argument".format(op))
         obj = type(self)(self)
+        obj.__function = [None]
         obj.__expr.append(ExpressionFunction(fn['func'],1,fn['str'],fn['latex'],op,False))
         return obj
 
@@ -782,6 +883,64 @@ nmatch = re.compile("\s*([a-zA-Z_][a-zA-Z0-9_]*)")
 gsmatch = re.compile('\s*(\()')
 gematch = re.compile('\s*(\))')
 
+# plugin modules, in load order, each providing equation_extend() to fill the tables above
+plugins = ['equation_base', 'equation_scipy']
+
+def load():
+    """Load the plugins
+
+    The plugins are imported and extended on the first call only, so that
+    importing the package does not pay for them, in particular for
+    ``scipy.constants`` pulled in by equation_scipy.
+    Expression calls this before parsing. Concurrent first calls wait for
+    the one loading, and the plugins count as loaded only once the tables
+    are complete, so that nothing parses against a partial table.
+    """
+    if load.loaded:
+        return
+    with _load_lock:
+        if load.loaded:
+            return
+        import importlib
+        import traceback
+        if __package__:
+            prefix = __package__ + "."
+        else:
+            prefix = ""
+        for plugin_file in plugins:
+            try:
+                plugin_script = importlib.import_module(prefix + plugin_file)
+                if not hasattr(plugin_script,'equation_extend'):
+                    sys.stderr.write("The plugin '{0:s}' is invalid because its missing the attribute 'equation_extend'\n".format(plugin_file))
+                    continue
+                plugin_script.equation_extend()
+            except Exception:
+                errtype, errinfo, errtrace = sys.exc_info()
+                fulltrace = ''.join(traceback.format_exception(errtype, errinfo, errtrace)[1:])
+                sys.stderr.write("Was unable to load {0:s}: {1:s}\nTraceback:\n{2:s}\n".format(plugin_file, str(errinfo), fulltrace))
+        while extensions:
+            extensions.pop(0)()
+        recalculateFMatch()
+        load.loaded = True
+load.loaded = False
+_load_lock = threading.RLock()
+
+# additions to the tables queued by extend until the plugins are loaded
+extensions = []
+
+def extend(extension):
+    """Call extension to add to the tables once the plugins are loaded
+
+    Before the first load the call is queued, so that registering does not load
+    the plugins, and load runs it after them, so that no plugin replaces it.
+    """
+    with _load_lock:
+        if load.loaded:
+            extension()
+            recalculateFMatch()
+        else:
+            extensions.append(extension)
+
 def recalculateFMatch():
     global fmatch, omatch, umatch
     fks = sorted(functions.keys(), key=len, reverse=True)
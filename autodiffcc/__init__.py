@@ -1,4 +1,7 @@
 name = "autodiffcc"
 from .ADmath import *
 from .core import *
-from .root import *
\ No newline at end of file
+from .hyperdual import *
+from .reverse import *
+from .root import *
+from .trace import *
@@ -1,13 +1,17 @@
+import functools
 import inspect
 import numpy as np
+from autodiffcc.dual import Dual
+from autodiffcc.sparse import SparseDer, _broadcast_shape, _colour_columns, _decompress, _sparse_jacobian, _sparsity_pattern
 
 class AD():
     """Create AD objects that allow for scalars and arrays with differentiation.
     
     ATTRIBUTES
     ==========
-    val : the value of the AD object, can be scalar or array
-    der : the derivative of the AD object, type should match val
+    val : the value of the AD object, can be scalar or an array of any shape
+    der : the derivative of the AD object, type should match val, or a SparseDer
+        holding only its nonzero partials if the object was created with sparse=True
     
     METHODS
     =======
@@ -26,13 +30,16 @@ class AD():
     # gives our operators priority over numpy's methods
     __array_priority__ = 2
 
+    # AD objects are created for every intermediate result, so they carry no __dict__
+    __slots__ = ('val', 'der')
+
     def __init__(self, val, **kwvars):
         val = np.array(val).astype(float)
-        # raise ValueError if val is a matrix
-        if len(val.shape) > 1:
-            raise ValueError("val must :be a scalar or vector, cannot be a matrix")
         if 'der' in kwvars:
-            self.der = np.array(kwvars['der']).astype(float)
+            if isinstance(kwvars['der'], SparseDer):
+                self.der = kwvars['der']
+            else:
+                self.der = np.array(kwvars['der']).astype(float)
             # check if user specifies n_vars and der, they should match
             if 'n_vars' in kwvars or 'idx' in kwvars:
                 raise ValueError('Either specify der or n_vars and idx, but not both')
@@ -45,13 +52,27 @@ class AD():
             else:
                 idx = kwvars['idx']
             n_vars = kwvars['n_vars']
-            if len(val.shape) == 0:
-                self.der = np.zeros(n_vars)
-                self.der[idx] = 1.0
+            if kwvars.get('sparse', False):
+                # store only the seed partial instead of a dense row of zeros
+                self.der = SparseDer({idx: np.ones(val.shape)}, n_vars, val.shape)
             else:
-                self.der = np.zeros((n_vars, val.shape[0]))
-                self.der[idx,:] = 1.0
+                # the derivative has the variables along its first axis and the shape of val after it
+                self.der = np.zeros((n_vars,) + val.shape)
+                self.der[idx] = 1.0
         self.val = val
+
+    @classmethod
+    def _new(cls, val, der):
+        """Returns an AD object holding val and der as they are, without copying or validation
+
+        The operators and ADmath functions build their results with _new, since numpy
+        already returns float arrays of the right shapes. Values from users go through
+        AD(val, ...), which converts and checks them.
+        """
+        obj = object.__new__(cls)
+        obj.val = val
+        obj.der = der
+        return obj
         
     def __pos__(self):
         """Returns the unary positive operator on self
@@ -68,7 +89,7 @@ class AD():
         =========
         >>> x = AD(val = 3, der = 1)
         >>> +x
-        (3.0, 1.0)
+        (array(3.), array(1.))
         """
         return self
 
@@ -89,7 +110,7 @@ class AD():
         >>> -x
         (-3.0, -1.0)
         """
-        return AD(val = -self.val, der = -self.der)
+        return AD._new(-self.val, -self.der)
 
     def __add__(self, other):
         """Returns the sum of self and other
@@ -107,12 +128,16 @@ class AD():
         =========
         >>> x = AD(val = 3, der = 1)
         >>> x + 3
-        (6.0, 1.0)
+        (6.0, array(1.))
         """
-        try:
-            return AD(val = self.val + other.val, der = self.der + other.der)
-        except AttributeError:
-            return self + AD(val = other, der = np.zeros(self.der.shape))
+        if isinstance(other, Dual):
+            other = other._to_ad()
+        if isinstance(other, AD):
+            val = self.val + other.val
+            return AD._new(val, _expand(self, val) + _expand(other, val))
+        # a constant has no derivative, so only the value changes
+        val = self.val + other
+        return AD._new(val, _expand(self, val))
 
     def __radd__(self, other):
         """Returns the reflected sum of self and other
@@ -130,7 +155,7 @@ class AD():
         =========
         >>> x = AD(val = 3, der = 1)
         >>> 3 + x
-        (6.0, 1.0)
+        (6.0, array(1.))
         """
         return self.__add__(other)
 
@@ -150,12 +175,15 @@ class AD():
         =========
         >>> x = AD(val = 3, der = 1)
         >>> x - 3
-        (0.0, 1.0)
+        (0.0, array(1.))
         """
-        try:
-            return AD(val = self.val - other.val, der = self.der - other.der)
-        except AttributeError:
-            return self - AD(val = other, der = np.zeros(self.der.shape))
+        if isinstance(other, Dual):
+            other = other._to_ad()
+        if isinstance(other, AD):
+            val = self.val - other.val
+            return AD._new(val, _expand(self, val) - _expand(other, val))
+        val = self.val - other
+        return AD._new(val, _expand(self, val))
 
     def __rsub__(self, other):
         """Returns the reflected difference of self and other
@@ -175,10 +203,8 @@ class AD():
         >>> 3 - x
         (0.0, -1.0)
         """
-        try:
-            return AD(val = other.val - self.val, der = other.der - self.der)
-        except AttributeError:
-            return AD(val = other, der = np.zeros(self.der.shape)) - self
+        val = other - self.val
+        return AD._new(val, -_expand(self, val))
 
     def __mul__(self, other):
         """Returns the product of self and other
@@ -198,10 +224,13 @@ class AD():
         >>> x * 3
         (9.0, 3.0)
         """
-        try:
-            return AD(val = self.val * other.val, der = self.val*other.der + other.val*self.der)
-        except AttributeError:
-            return self * AD(val = other, der = np.zeros(self.der.shape))
+        if isinstance(other, Dual):
+            other = other._to_ad()
+        if isinstance(other, AD):
+            val = self.val * other.val
+            return AD._new(val, self.val*_expand(other, val) + other.val*_expand(self, val))
+        val = self.val * other
+        return AD._new(val, other * _expand(self, val))
 
     def __rmul__(self, other):
         """Returns the reflected product of self and other
@@ -241,11 +270,14 @@ class AD():
         >>> x / 3
         (1.0, 0.3333333333333333)
         """
-        try:
-            return AD(val = self.val / other.val, 
-                der = (other.val*self.der - self.val*other.der)/(other.val*other.val))
-        except AttributeError:
-            return self / AD(val = other, der = np.zeros(self.der.shape))
+        if isinstance(other, Dual):
+            other = other._to_ad()
+        if isinstance(other, AD):
+            val = self.val / other.val
+            return AD._new(val,
+                (other.val*_expand(self, val) - self.val*_expand(other, val))/(other.val*other.val))
+        val = self.val / other
+        return AD._new(val, _expand(self, val) / other)
 
     def __rtruediv__(self, other):
         """Returns the reflected quotient of self and other
@@ -265,11 +297,8 @@ class AD():
         >>> 3 / x
         (1.0, -0.3333333333333333)
         """
-        try:
-            return AD(val = other.val/self.val, 
-                der = (self.val*other.der - other.val*self.der)/(self.val*self.val))
-        except AttributeError:
-            return AD(val = other, der = np.zeros(self.der.shape)) / self
+        val = other / self.val
+        return AD._new(val, (-other * _expand(self, val)) / (self.val * self.val))
 
     def __pow__(self, other):
         """Returns self to the power of other
@@ -289,15 +318,19 @@ class AD():
         >>> x ** 2
         (9.0, 6.0)
         """
-        try:
+        if isinstance(other, Dual):
+            other = other._to_ad()
+        if isinstance(other, AD):
+            val = self.val ** other.val
             if (self.val).all() == 0:
-                return AD(val = self.val ** other.val, 
-                    der = self.val ** (other.val - 1) * (self.val * other.der + other.val * self.der))
+                return AD._new(val,
+                    self.val ** (other.val - 1) * (self.val * _expand(other, val) + other.val * _expand(self, val)))
             else:
-                return AD(val = self.val ** other.val, 
-                    der = self.val ** (other.val - 1) * (self.val * other.der * np.log(np.abs(self.val)) + other.val * self.der))
-        except AttributeError:
-            return self ** AD(val = other, der = np.zeros(self.der.shape))
+                return AD._new(val,
+                    self.val ** (other.val - 1) * (self.val * _expand(other, val) * np.log(np.abs(self.val)) + other.val * _expand(self, val)))
+        # a constant exponent only contributes the power rule
+        val = self.val ** other
+        return AD._new(val, self.val ** (other - 1) * (other * _expand(self, val)))
 
     def __rpow__(self, other):
         """Returns other to the power of self
@@ -315,17 +348,13 @@ class AD():
         =========
         >>> x = AD(val = 3, der = 1)
         >>> 2 ** x
-        (8.0, 5.54517744)
+        (8.0, 5.545177444479562)
         """
-        try:
-            if (self.val).all() == 0:
-                return AD(val = other.val ** self.val, 
-                    der = other.val ** (self.val - 1) * (other.val * self.der + self.val * other.der))
-            else:
-                return AD(val = other.val ** self.val, 
-                    der = other.val ** (self.val - 1) * (other.val * self.der * np.log(np.abs(other.val)) + self.val * other.der))
-        except AttributeError:
-            return AD(val = other, der = np.zeros(self.der.shape)) ** self
+        other = np.asarray(other, dtype = float)
+        val = other ** self.val
+        # the derivative with respect to the exponent vanishes where the base is 0
+        log_base = np.log(np.abs(np.where(other == 0, 1.0, other)))
+        return AD._new(val, (val * log_base) * _expand(self, val))
 
     def __eq__(self, other):
         """Returns True if self and other have the same value
@@ -348,10 +377,9 @@ class AD():
         >>> x == y
         True
         """
-        try:
+        if isinstance(other, AD):
             return self.val == other.val
-        except AttributeError:
-            return self.val == other
+        return self.val == other
 
     def __gt__(self, other):
         """Returns True if self's value is greater than other's value
@@ -374,10 +402,9 @@ class AD():
         >>> x > y
         False
         """
-        try:
+        if isinstance(other, AD):
             return self.val > other.val
-        except AttributeError:
-            return self.val > other
+        return self.val > other
 
     def __ge__(self, other):
         """Returns True if self's value is greater than or equal to other's value
@@ -400,7 +427,7 @@ class AD():
         >>> x >= y
         True
         """
-        return (self > other) or (self == other)
+        return (self > other) | (self == other)
 
     def __lt__(self, other):
         """Returns True if self's value is less than other's value
@@ -423,10 +450,9 @@ class AD():
         >>> x < y
         True
         """
-        try:
+        if isinstance(other, AD):
             return self.val < other.val
-        except AttributeError:
-            return self.val < other
+        return self.val < other
 
     def __le__(self, other):
         """Returns True if self's value is less than or equal to other's value
@@ -449,29 +475,487 @@ class AD():
         >>> x <= y
         False
         """
-        return (self < other) or (self == other)
+        return (self < other) | (self == other)
+
+    def __abs__(self):
+        """Returns the absolute value of self
+
+        EXAMPLES
+        =========
+        >>> x = AD(val = -3, der = 1)
+        >>> abs(x)
+        (3.0, -1.0)
+        """
+        return AD._new(np.abs(self.val), np.sign(self.val) * self.der)
+
+    @property
+    def T(self):
+        """Returns the transpose of self
+
+        EXAMPLES
+        =========
+        >>> x = AD(val = [[1, 2]], n_vars = 1, idx = 0)
+        >>> x.T.val
+        array([[1.],
+               [2.]])
+        """
+        return _transpose(self)
+
+    def __matmul__(self, other):
+        """Returns the matrix product of self and other
+
+        EXAMPLES
+        =========
+        >>> x = AD(val = [1, 2], n_vars = 1, idx = 0)
+        >>> x @ np.array([3, 4])
+        (11.0, array([7.]))
+        """
+        return _matmul(self, other)
+
+    def __rmatmul__(self, other):
+        """Returns the reflected matrix product of self and other"""
+        return _matmul(other, self)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Evaluates numpy ufuncs such as np.sin or np.add on AD objects through the
+        AD operators and ADmath functions"""
+        return _array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Evaluates numpy functions such as np.sum or np.dot on AD objects"""
+        if func not in _HANDLED_FUNCTIONS:
+            return NotImplemented
+        return _HANDLED_FUNCTIONS[func](*args, **kwargs)
 
     def __repr__(self):
         return str((self.val, self.der))
 
-def differentiate(base_func):
+
+def _expand(obj, val):
+    """Returns the derivative of the AD object obj broadcast to (n_vars,) + the shape of val
+
+    INPUTS
+    =======
+    obj: AD object, an operand of the operation that returned val
+    val: the value of the result of the operation
+
+    NOTES
+    =====
+    Numpy aligns shapes from the right, so an operand with fewer value axes than the
+    result would have its variable axis matched against a value axis. Singleton axes
+    are inserted after the variable axis before broadcasting. Derivatives that already
+    have the shape of the result, the common case, are returned as they are, and so are
+    derivatives without a variable axis. SparseDer objects only take the new shape.
+
+    EXAMPLES
+    =========
+    >>> _expand(AD(2., n_vars=2, idx=0), np.ones((2, 2))).shape
+    (2, 2, 2)
+    """
+    der = obj.der
+    if der.shape[1:] == val.shape:
+        return der
+    if isinstance(der, SparseDer):
+        # the partials have no variable axis, so numpy broadcasts them against the new shape as they are
+        return SparseDer(der.partials, der.n_vars, val.shape)
+    if der.ndim != obj.val.ndim + 1:
+        return der
+    der = np.reshape(der, der.shape[:1] + (1,) * (val.ndim - obj.val.ndim) + der.shape[1:])
+    return np.broadcast_to(der, der.shape[:1] + val.shape)
+
+
+# numpy ufuncs and functions that AD objects implement, keyed by the numpy object
+_HANDLED_UFUNCS = {}
+_HANDLED_FUNCTIONS = {}
+
+
+def implements(numpy_function, ufunc=False):
+    """Returns a decorator that registers a function as the implementation of
+    numpy_function for AD objects
+
+    INPUTS
+    =======
+    numpy_function: the numpy ufunc or function, e.g. np.sin or np.sum
+    ufunc: True if numpy_function is a ufunc
+
+    EXAMPLES
+    =========
+    >>> @implements(np.cbrt, ufunc=True)
+    ... def cbrt(obj):
+    ...     return obj ** (1 / 3)
+    """
+    table = _HANDLED_UFUNCS if ufunc else _HANDLED_FUNCTIONS
+
+    def decorator(func):
+        table[numpy_function] = func
+        return func
+
+    return decorator
+
+
+def _array_ufunc(ufunc, method, inputs, kwargs):
+    """Calls the implementation of a plain ufunc call, or returns NotImplemented for
+    ufuncs, methods such as reduce, and arguments such as out that are not supported"""
+    if method != '__call__' or kwargs or ufunc not in _HANDLED_UFUNCS:
+        return NotImplemented
+    return _HANDLED_UFUNCS[ufunc](*inputs)
+
+
+def _operator(name, reflected_name, types):
+    """Returns a binary ufunc implementation that calls the operator of whichever
+    argument is of the differentiable types"""
+    def ufunc(a, b):
+        if isinstance(a, types):
+            return getattr(a, name)(b)
+        return getattr(b, reflected_name)(a)
+    return ufunc
+
+
+# binary ufuncs and the operators that implement them
+_OPERATOR_UFUNCS = [(np.add, '__add__', '__radd__'),
+                    (np.subtract, '__sub__', '__rsub__'),
+                    (np.multiply, '__mul__', '__rmul__'),
+                    (np.true_divide, '__truediv__', '__rtruediv__'),
+                    (np.power, '__pow__', '__rpow__'),
+                    (np.matmul, '__matmul__', '__rmatmul__'),
+                    (np.equal, '__eq__', '__eq__'),
+                    (np.greater, '__gt__', '__lt__'),
+                    (np.greater_equal, '__ge__', '__le__'),
+                    (np.less, '__lt__', '__gt__'),
+                    (np.less_equal, '__le__', '__ge__')]
+for _ufunc, _name, _reflected_name in _OPERATOR_UFUNCS:
+    _HANDLED_UFUNCS[_ufunc] = _operator(_name, _reflected_name, (AD, Dual))
+_HANDLED_UFUNCS[np.negative] = lambda obj: -obj
+_HANDLED_UFUNCS[np.positive] = lambda obj: +obj
+_HANDLED_UFUNCS[np.absolute] = abs
+_HANDLED_UFUNCS[np.square] = lambda obj: obj * obj
+_HANDLED_UFUNCS[np.reciprocal] = lambda obj: 1 / obj
+
+
+def _matmul(a, b):
+    """Returns the matrix product of a and b, either of which may be an AD object
+
+    The variable axis of a derivative acts as a batch axis of np.matmul, so each
+    partial derivative is multiplied by the other factor's value.
+    """
+    if isinstance(a, Dual):
+        a = a._to_ad()
+    if isinstance(b, Dual):
+        b = b._to_ad()
+    a_val = a.val if isinstance(a, AD) else np.asarray(a, dtype=float)
+    b_val = b.val if isinstance(b, AD) else np.asarray(b, dtype=float)
+    der = 0
+    if isinstance(a, AD):
+        der = der + np.matmul(a.der, b_val)
+    if isinstance(b, AD):
+        if np.ndim(b_val) == 1:
+            der = der + np.matmul(b.der, np.transpose(a_val))
+        else:
+            der = der + np.matmul(a_val, b.der)
+    return AD._new(np.matmul(a_val, b_val), der)
+
+
+@implements(np.dot)
+def _dot(a, b):
+    """Returns the dot product of a and b, either of which may be an AD object"""
+    if np.ndim(getattr(a, 'val', a)) == 0 or np.ndim(getattr(b, 'val', b)) == 0:
+        return a * b
+    return _matmul(a, b)
+
+
+def _axes(axis, ndim):
+    """Returns the value axes that axis refers to as a tuple of non-negative integers"""
+    if axis is None:
+        return tuple(range(ndim))
+    if isinstance(axis, tuple):
+        return tuple(ax % ndim for ax in axis)
+    return (axis % ndim,)
+
+
+@implements(np.sum)
+def _sum(a, axis=None, keepdims=False):
+    """Returns the sum of the values of an AD object over axis"""
+    if isinstance(a, Dual):
+        return a
+    axes = _axes(axis, np.ndim(a.val))
+    # the derivative has the variables along its first axis, so value axis k is axis k + 1
+    return AD._new(np.sum(a.val, axis=axes, keepdims=keepdims),
+                   np.sum(a.der, axis=tuple(ax + 1 for ax in axes), keepdims=keepdims))
+
+
+@implements(np.mean)
+def _mean(a, axis=None, keepdims=False):
+    """Returns the mean of the values of an AD object over axis"""
+    if isinstance(a, Dual):
+        return a
+    axes = _axes(axis, np.ndim(a.val))
+    count = 1
+    for ax in axes:
+        count *= np.shape(a.val)[ax]
+    return _sum(a, axis, keepdims) / count
+
+
+@implements(np.transpose)
+def _transpose(a, axes=None):
+    """Returns an AD object with the axes of its value permuted"""
+    if isinstance(a, Dual):
+        return a
+    if axes is None:
+        axes = tuple(reversed(range(np.ndim(a.val))))
+    return AD._new(np.transpose(a.val, axes), np.transpose(a.der, (0,) + tuple(ax + 1 for ax in axes)))
+
+
+@implements(np.linalg.inv)
+def _inv(a):
+    """Returns the inverse of a square AD matrix, using d(A^-1) = -A^-1 dA A^-1"""
+    inverse = np.linalg.inv(a.val)
+    return AD._new(inverse, -np.matmul(np.matmul(inverse, a.der), inverse))
+
+
+@implements(np.linalg.det)
+def _det(a):
+    """Returns the determinant of a square AD matrix, using d(det A) = det A tr(A^-1 dA)"""
+    det = np.linalg.det(a.val)
+    inverse_t = np.swapaxes(np.linalg.inv(a.val), -1, -2)
+    return AD._new(det, det * np.sum(inverse_t * a.der, axis=(-2, -1)))
+
+
+@implements(np.linalg.solve)
+def _solve(a, b):
+    """Returns the solution x of a @ x = b, either of which may be an AD object,
+    using dx = A^-1 (db - dA x)"""
+    a_val = a.val if isinstance(a, AD) else np.asarray(a, dtype=float)
+    b_val = b.val if isinstance(b, AD) else np.asarray(b, dtype=float)
+    x = np.linalg.solve(a_val, b_val)
+    rhs = 0
+    if isinstance(b, AD):
+        rhs = rhs + b.der
+    if isinstance(a, AD):
+        rhs = rhs - np.matmul(a.der, x)
+    rhs = rhs * np.ones((1,) + x.shape)
+    if x.ndim == 1:
+        # solve for every variable at once, with one column of the right-hand side per variable
+        der = np.linalg.solve(a_val, rhs.T).T
+    else:
+        der = np.linalg.solve(a_val, rhs)
+    return AD._new(x, der)
+
+
+def _get_variables(base_func, posvars, kwvars, signature=None):
+    """Returns the values passed to a differentiated function as a list ordered by the
+    signature of base_func
+
+    INPUTS
+    =======
+    base_func: the function being differentiated
+    posvars: tuple of positional values passed to the derivative function
+    kwvars: dict of keyword values passed to the derivative function
+    signature: the parameters of base_func from inspect.signature, looked up if None
+
+    RETURNS
+    ========
+    a list with one value per variable of base_func
+
+    NOTES
+    =====
+    If base_func takes *args, any number of positional values is accepted.
+    """
+    if signature is None:
+        signature = inspect.signature(base_func).parameters
+    n_vars_base_func = len(signature)
+
+    if len(posvars) != 0 and len(kwvars.keys()) != 0:
+        raise KeyError("Cannot include both posvars and kwvars. Must include only one.")
+    elif len(posvars) == 0 and len(kwvars.keys()) == 0:
+        raise KeyError("Must include one of posvars or kwvars.")
+    elif len(posvars) == 0:
+        # turn keyword variables into positional variables matching function signature
+        variables = []
+        for key in signature:
+            try:
+                variables.append(kwvars[key])
+            except KeyError:
+                raise KeyError(f"key {key} in base_func signature missing from kwvars")
+        if len(kwvars.keys()) != n_vars_base_func:
+            raise KeyError("Too many keys passed in kwvars")
+    else:
+        # using positional variables
+        variables = list(posvars)
+        if any(param.kind == param.VAR_POSITIONAL for param in signature.values()):
+            return variables
+    # check to make sure there are no extra arguments passed
+    if len(variables) != n_vars_base_func:
+        raise KeyError("Incorrect number of variables passed in arguments.")
+    return variables
+
+
+def _get_inputs(base_func, inputs):
+    """Returns the values in inputs as a list ordered by the signature of base_func
+
+    INPUTS
+    =======
+    base_func: the function being differentiated
+    inputs: list of values, or dict of values keyed by variable name
+
+    RETURNS
+    ========
+    a list with one value per variable of base_func
+    """
+    if isinstance(inputs, dict):
+        return _get_variables(base_func, (), inputs)
+    return _get_variables(base_func, tuple(inputs), {})
+
+
+def _batch_jacobian(result, n_vars, n_points):
+    """Returns the stacked Jacobians of a function evaluated on batched AD variables
+
+    INPUTS
+    =======
+    result: the output of base_func evaluated on AD objects whose val has shape (n_points,)
+    n_vars: number of variables of base_func
+    n_points: number of points in the batch
+
+    RETURNS
+    ========
+    numpy array of shape (n_points, n_outputs, n_vars), the Jacobian at each point
+    """
+    if np.isscalar(result) or isinstance(result, AD):
+        outputs = [result]
+    else:
+        outputs = list(result)
+    jacobians = np.zeros((n_points, len(outputs), n_vars))
+    for i, output in enumerate(outputs):
+        if isinstance(output, AD):
+            # outputs that do not depend on the batch carry der of shape (n_vars,)
+            der = output.der.reshape(n_vars, -1)
+            jacobians[:, i, :] = np.broadcast_to(der, (n_vars, n_points)).T
+    return jacobians
+
+
+def _jacobian_function(base_func, batch, sparse, compress):
+    """Returns a function that takes as input a value and returns the output of
+    base_func evaluated on AD objects at the value together with its Jacobian
+
+    INPUTS
+    =======
+    base_func: a function that uses autodiffcc math functions to create an output
+    batch, sparse, compress: as in differentiate
+
+    RETURNS
+    ========
+    a function returning (result, jacobian), where result is what base_func returned
+        and jacobian is what differentiate(base_func) returns
+    """
+    # sparsity pattern and column colours found on the first compressed call, keyed by n_vars
+    patterns = {}
+    signature = inspect.signature(base_func).parameters
+
+    def evaluate(*posvars, **kwvars):
+        variables = _get_variables(base_func, posvars, kwvars, signature)
+        n_vars_inner = len(variables)
+
+        if batch and (sparse or compress):
+            raise ValueError("batch cannot be used together with sparse or compress")
+
+        if compress:
+            if any(np.ndim(value) != 0 for value in variables):
+                raise ValueError("compress requires every input to be a scalar")
+            if n_vars_inner not in patterns:
+                # propagate dependency sets once to find which outputs depend on which inputs
+                sparse_variables = [AD(value, n_vars = n_vars_inner, idx = i, sparse = True)
+                                    for i, value in enumerate(variables)]
+                rows, cols = _sparsity_pattern(base_func(*sparse_variables))
+                patterns[n_vars_inner] = (rows, cols, _colour_columns(rows, cols, n_vars_inner))
+            rows, cols, colours = patterns[n_vars_inner]
+
+            # seed every variable with the direction of its colour
+            seeds = np.eye(colours.max() + 1)[colours]
+            result = base_func(*[AD(value, der = seeds[i]) for i, value in enumerate(variables)])
+            return result, _decompress(result, rows, cols, colours, n_vars_inner)
+
+        if batch:
+            # every variable carries the batch as its value, derivatives have shape (n_vars, n_points)
+            variables = list(np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in variables]))
+            if variables[0].ndim != 1:
+                raise ValueError("batch inputs must be scalars or 1-D arrays of equal length")
+            n_points = variables[0].shape[0]
+
+        if not (batch or sparse) and all(np.ndim(value) == 0 for value in variables):
+            # scalar inputs use dual numbers on Python floats, which avoid numpy's per-call overhead
+            for i in range(n_vars_inner):
+                variables[i] = Dual(variables[i], [1.0 if j == i else 0.0 for j in range(n_vars_inner)])
+        else:
+            for i in range(len(variables)):
+                # add key to variable
+                variables[i] = AD(variables[i], n_vars = n_vars_inner, idx = i, sparse = sparse)
+        
+        # run base_func on input values now keeping track of derivative
+        result = base_func(*variables)
+
+        if sparse:
+            return result, _sparse_jacobian(result, n_vars_inner, functools.reduce(_broadcast_shape, [var.val.shape for var in variables]))
+
+        if batch:
+            return result, _batch_jacobian(result, n_vars_inner, n_points)
+
+        # if base_func returns a scalar and not an AD object
+        if np.isscalar(result):
+            return result, AD(result, der=0).der
+        # if base_func is a scalar function, return 1-D flat derivative (combining multiple vector-valued inputs)
+        if isinstance(result, (AD, Dual)):
+            return result, np.array(result.der, dtype=float).reshape(1,-1)
+
+        # if base_func is vector function, return 2-D Jacobian where each row is f1, f2, ...
+        n_fn_dim = len(result)
+        final_der = []
+        for ad_obj in result:
+            if not isinstance(ad_obj, (AD, Dual)):
+                final_der.append(np.zeros(n_vars_inner))
+            else:
+                final_der.append(np.array(ad_obj.der, dtype=float).flatten())
+
+        return result, np.array(final_der)
+
+    return evaluate
+
+
+def differentiate(base_func, batch=False, sparse=False, compress=False):
     """Returns a function that takes as input a value and returns the derivative of 
     base_func evaluated at the value
     
     INPUTS
     =======
     base_func: a function that uses autodiffcc math functions to create an output
+    batch: if True, each input is an array of values at many points and the Jacobian
+        at every point is computed in one vectorized pass
+    sparse: if True, derivatives store only their nonzero partials and the Jacobian is
+        returned as a scipy.sparse csr_matrix, which suits functions of many variables
+        where each output depends on only a few of them
+    compress: if True, the sparsity pattern of the Jacobian is detected on the first
+        call and its columns are coloured so that columns with no output in common
+        share one seed direction; every call then propagates one direction per colour
+        and returns a scipy.sparse csr_matrix
     
     RETURNS
     ========
     a function that takes as input a value and returns the derivative of base_func
-        evaluated at the value
+        evaluated at the value. With batch=True it returns an array of shape
+        (n_points, n_outputs, n_vars) holding the Jacobian at each point. With
+        sparse=True it returns a scipy.sparse csr_matrix with the layout of the
+        dense Jacobian.
     
     NOTES
     =====
     PRE: 
          - if a scalar function, base_func returns a scalar
          - if a vector function, base_func returns tuple, list, or numpy array
+         - if batch is True, each input is a scalar or 1-D array, and arrays share one length
+         - if every input is a scalar, base_func is evaluated on Dual numbers, which
+           become AD objects when combined with numpy arrays
+         - if sparse is True, scipy is installed and batch is False
+         - if compress is True, scipy is installed, batch is False, every input is a
+           scalar and the dependency of each output on the inputs does not change
+           between calls
 
     EXAMPLES
     =========
@@ -479,57 +963,126 @@ def differentiate(base_func):
     ...     return 3*(x**2)
     >>> dfdx = differentiate(f)
     >>> dfdx(x=5)
-    30.0
+    array([[30.]])
+    >>> differentiate(f, batch=True)(x=[1, 2, 3])
+    array([[[ 6.]],
+    <BLANKLINE>
+           [[12.]],
+    <BLANKLINE>
+           [[18.]]])
     """
+    evaluate = _jacobian_function(base_func, batch, sparse, compress)
+
     def base_func_der(*posvars, **kwvars):
-        signature = inspect.signature(base_func).parameters
-        n_vars_base_func = len(signature)
-
-        if len(posvars) != 0 and len(kwvars.keys()) != 0:
-            raise KeyError("Cannot include both posvars and kwvars. Must include only one.")
-        elif len(posvars) == 0 and len(kwvars.keys()) == 0:
-            raise KeyError("Must include one of posvars or kwvars.")
-        elif len(posvars) == 0:
-            # turn keyword variables into positional variables matching function signature
-            variables = []
-            for key in signature:
-                try:
-                    variables.append(kwvars[key])
-                except KeyError:
-                    raise KeyError(f"key {key} in base_func signature missing from kwvars")
-            if len(kwvars.keys()) != n_vars_base_func:
-                raise KeyError("Too many keys passed in kwvars")
-        else:
-            # using positional variables
-            variables = list(posvars)
-        n_vars_inner = len(variables)
-        # check to make sure there are no extra arguments passed
-        if n_vars_inner != n_vars_base_func:
-            raise KeyError("Incorrect number of variables passed in arguments.")
+        return evaluate(*posvars, **kwvars)[1]
 
-        for i in range(len(variables)):
-            # add key to variable
-            variables[i] = AD(variables[i], n_vars = n_vars_base_func, idx = i)
-        
-        # run base_func on input values now keeping track of derivative
-        result = base_func(*variables)
+    return base_func_der
 
-        # if base_func returns a scalar and not an AD object
-        if np.isscalar(result):
-            return AD(result, der=0).der
-        # if base_func is a scalar function, return 1-D flat derivative (combining multiple vector-valued inputs)
-        if isinstance(result, AD):
-            return result.der.flatten().reshape(1,-1)
 
-        # if base_func is vector function, return 2-D Jacobian where each row is f1, f2, ...
-        n_fn_dim = len(result)
-        final_der = []
-        for ad_obj in result:
-            if not isinstance(ad_obj, AD):
-                final_der.append(np.zeros(n_vars_inner))
-            else:
-                final_der.append(ad_obj.der.flatten())
+def _value(result):
+    """Returns the output of a function evaluated on AD objects with every AD and
+    Dual output replaced by its value
+
+    INPUTS
+    =======
+    result: the output of base_func evaluated on AD or Dual objects
+
+    RETURNS
+    ========
+    the value of a scalar function, or a numpy array with one value per output of a
+        vector function
+    """
+    if isinstance(result, (AD, Dual)):
+        return result.val
+    if np.isscalar(result):
+        return result
+    # constant outputs are broadcast to the shape of the outputs that depend on vector inputs
+    return np.array(np.broadcast_arrays(*[output.val if isinstance(output, (AD, Dual)) else output
+                                          for output in result]))
+
+
+def value_and_jacobian(base_func, batch=False, sparse=False, compress=False):
+    """Returns a function that takes as input a value and returns both the value of
+    base_func and its Jacobian at the value from a single evaluation
+
+    INPUTS
+    =======
+    base_func: a function that uses autodiffcc math functions to create an output
+    batch, sparse, compress: as in differentiate
+
+    RETURNS
+    ========
+    a function that takes as input a value and returns a tuple (value, jacobian): the
+        value of base_func, as a numpy array with one entry per output for a vector
+        function, and the Jacobian that differentiate(base_func) would return
+
+    NOTES
+    =====
+    The value is read from the AD objects that carry the derivative, so base_func is
+    evaluated once rather than once for the value and once for the Jacobian.
+
+    EXAMPLES
+    =========
+    >>> def f(x, y):
+    ...     return x * y, x + y
+    >>> value_and_jacobian(f)(2, 3)
+    (array([6., 5.]), array([[3., 2.],
+           [1., 1.]]))
+    """
+    evaluate = _jacobian_function(base_func, batch, sparse, compress)
+
+    def base_func_value_and_der(*posvars, **kwvars):
+        result, jacobian = evaluate(*posvars, **kwvars)
+        return _value(result), jacobian
+
+    return base_func_value_and_der
+
+
+def jvp(base_func, x, v):
+    """Returns the product of the Jacobian of base_func at x with the direction v,
+    without forming the Jacobian
+
+    INPUTS
+    =======
+    base_func: a function that uses autodiffcc math functions to create an output
+    x: list of values, or dict of values keyed by variable name, at which the
+        Jacobian is evaluated
+    v: list with one direction per variable, in the order of base_func's signature
+
+    RETURNS
+    ========
+    numpy array with one entry per output of base_func, equal to
+        differentiate(base_func)(*x) @ v for scalar inputs
+
+    NOTES
+    =====
+    Every variable is seeded with its entry of v rather than with a unit vector per
+    variable, so each derivative is a single number and the cost of jvp does not grow
+    with the number of variables. For vector inputs the products are taken elementwise.
+
+    EXAMPLES
+    =========
+    >>> def f(x, y):
+    ...     return x * y, x + y
+    >>> jvp(f, [2, 3], [1, 1])
+    array([5., 2.])
+    """
+    variables = _get_inputs(base_func, x)
+    if len(v) != len(variables):
+        raise ValueError("v must have one entry per variable of base_func")
 
-        return np.array(final_der)
+    # seed the single direction v instead of one unit vector per variable, as one
+    # variable so that the derivatives keep the (n_vars,) + val.shape layout
+    variables = [AD(value, der = np.broadcast_to(direction, np.shape(value))[np.newaxis])
+                 for value, direction in zip(variables, v)]
+    result = base_func(*variables)
 
-    return base_func_der
\ No newline at end of file
+    if np.isscalar(result) or isinstance(result, AD):
+        result = [result]
+    tangents = [output.der[0] for output in result if isinstance(output, AD)]
+    # constant outputs have zero tangents, shaped like the others so that they stack into one array
+    shape = ()
+    for tangent in tangents:
+        shape = _broadcast_shape(shape, np.shape(tangent))
+    return np.array([output.der[0] if isinstance(output, AD) else np.zeros(_broadcast_shape(shape, np.shape(output)))
+                     for output in result])
@@ -0,0 +1,231 @@
+import math
+import numpy as np
+from autodiffcc import core
+
+# plain Python numbers combine with Dual directly, anything else promotes it to AD
+_NUMBERS = (int, float)
+
+
+class Dual():
+    """Create dual numbers for scalar functions of a few variables.
+
+    A Dual holds its value as a Python float and its derivative as a tuple of
+    Python floats, one per variable, so operations avoid the per-call overhead of
+    numpy on 0-d arrays. Combining a Dual with a numpy array or an AD object
+    promotes it to an AD object first.
+
+    ATTRIBUTES
+    ==========
+    val : the value of the Dual, a float
+    der : the derivative of the Dual, a tuple with one float per variable
+
+    METHODS
+    =======
+    Overloads basic arithmetic operations.
+
+    NOTES
+    =====
+    Operations follow Python float semantics, except that divisions by zero and
+    powers without a real result are promoted to AD so they give inf or nan as numpy
+    does.
+
+    EXAMPLES
+    ========
+    >>> x = Dual(3, (1, 0))
+    >>> y = Dual(4, (0, 1))
+    >>> x * y + 2
+    Dual(14.0, (4.0, 3.0))
+    """
+
+    __slots__ = ('val', 'der')
+
+    def __init__(self, val, der):
+        self.val = float(val)
+        self.der = tuple(float(d) for d in der)
+
+    @classmethod
+    def _new(cls, val, der):
+        """Returns a Dual holding val and der as they are, without conversion"""
+        obj = object.__new__(cls)
+        obj.val = val
+        obj.der = der
+        return obj
+
+    def _chain(self, val, der):
+        """Returns f(self) given val = f(self.val) and der = f'(self.val)"""
+        return Dual._new(val, tuple(der * d for d in self.der))
+
+    def _to_ad(self):
+        """Returns self as an AD object with a scalar value"""
+        return core.AD._new(np.float64(self.val), np.array(self.der))
+
+    def __pos__(self):
+        """Returns the unary positive operator on self"""
+        return self
+
+    def __neg__(self):
+        """Returns the unary negative operator on self
+
+        EXAMPLES
+        =========
+        >>> -Dual(3, (1,))
+        Dual(-3.0, (-1.0,))
+        """
+        return Dual._new(-self.val, tuple(-d for d in self.der))
+
+    def __add__(self, other):
+        """Returns the sum of self and other
+
+        EXAMPLES
+        =========
+        >>> Dual(3, (1,)) + 3
+        Dual(6.0, (1.0,))
+        """
+        if isinstance(other, Dual):
+            return Dual._new(self.val + other.val, tuple(a + b for a, b in zip(self.der, other.der)))
+        if isinstance(other, _NUMBERS):
+            return Dual._new(self.val + other, self.der)
+        return self._to_ad() + other
+
+    def __radd__(self, other):
+        """Returns the reflected sum of self and other"""
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """Returns the difference of self and other"""
+        if isinstance(other, Dual):
+            return Dual._new(self.val - other.val, tuple(a - b for a, b in zip(self.der, other.der)))
+        if isinstance(other, _NUMBERS):
+            return Dual._new(self.val - other, self.der)
+        return self._to_ad() - other
+
+    def __rsub__(self, other):
+        """Returns the reflected difference of self and other"""
+        if isinstance(other, _NUMBERS):
+            return Dual._new(other - self.val, tuple(-d for d in self.der))
+        return other - self._to_ad()
+
+    def __mul__(self, other):
+        """Returns the product of self and other
+
+        EXAMPLES
+        =========
+        >>> Dual(3, (1,)) * 3
+        Dual(9.0, (3.0,))
+        """
+        if isinstance(other, Dual):
+            a, b = self.val, other.val
+            return Dual._new(a * b, tuple(a * db + b * da for da, db in zip(self.der, other.der)))
+        if isinstance(other, _NUMBERS):
+            return Dual._new(self.val * other, tuple(other * d for d in self.der))
+        return self._to_ad() * other
+
+    def __rmul__(self, other):
+        """Returns the reflected product of self and other"""
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """Returns the quotient of self and other"""
+        if isinstance(other, Dual) and other.val != 0:
+            a, b = self.val, other.val
+            return Dual._new(a / b, tuple((b * da - a * db) / (b * b) for da, db in zip(self.der, other.der)))
+        if isinstance(other, _NUMBERS) and other != 0:
+            return Dual._new(self.val / other, tuple(d / other for d in self.der))
+        return self._to_ad() / other
+
+    def __rtruediv__(self, other):
+        """Returns the reflected quotient of self and other"""
+        if isinstance(other, _NUMBERS) and self.val != 0:
+            val = other / self.val
+            return Dual._new(val, tuple(-val / self.val * d for d in self.der))
+        return other / self._to_ad()
+
+    def __pow__(self, other):
+        """Returns self to the power of other
+
+        EXAMPLES
+        =========
+        >>> Dual(3, (1,)) ** 2
+        Dual(9.0, (6.0,))
+        """
+        a = self.val
+        if isinstance(other, Dual):
+            b = other.val
+            if _real_power(a, b):
+                val = a ** b
+                # the derivative with respect to the exponent vanishes where the base is 0
+                log_a = math.log(abs(a)) if a != 0 else 0.0
+                return Dual._new(val, tuple(b * a ** (b - 1) * da + val * log_a * db
+                                            for da, db in zip(self.der, other.der)))
+            return self._to_ad() ** other._to_ad()
+        if isinstance(other, _NUMBERS) and _real_power(a, other):
+            return self._chain(a ** other, other * a ** (other - 1))
+        return self._to_ad() ** other
+
+    def __rpow__(self, other):
+        """Returns other to the power of self
+
+        EXAMPLES
+        =========
+        >>> 2 ** Dual(3, (1,))
+        Dual(8.0, (5.545177444479562,))
+        """
+        if isinstance(other, _NUMBERS) and _real_power(other, self.val):
+            val = other ** self.val
+            return self._chain(val, val * math.log(abs(other)) if other != 0 else 0.0)
+        return other ** self._to_ad()
+
+    def __abs__(self):
+        """Returns the absolute value of self"""
+        if self.val < 0:
+            return -self
+        return Dual._new(self.val, tuple(d if self.val > 0 else 0.0 for d in self.der))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Evaluates numpy ufuncs such as np.sin or np.add on Dual numbers through the
+        same implementations as for AD objects"""
+        return core._array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Evaluates numpy functions such as np.sum or np.dot on Dual numbers"""
+        if func not in core._HANDLED_FUNCTIONS:
+            return NotImplemented
+        return core._HANDLED_FUNCTIONS[func](*args, **kwargs)
+
+    def __eq__(self, other):
+        """Returns True if self and other have the same value"""
+        if isinstance(other, Dual):
+            return self.val == other.val
+        return self.val == other
+
+    def __gt__(self, other):
+        """Returns True if self's value is greater than other's value"""
+        if isinstance(other, Dual):
+            return self.val > other.val
+        return self.val > other
+
+    def __ge__(self, other):
+        """Returns True if self's value is greater than or equal to other's value"""
+        return (self > other) | (self == other)
+
+    def __lt__(self, other):
+        """Returns True if self's value is less than other's value"""
+        if isinstance(other, Dual):
+            return self.val < other.val
+        return self.val < other
+
+    def __le__(self, other):
+        """Returns True if self's value is less than or equal to other's value"""
+        return (self < other) | (self == other)
+
+    def __repr__(self):
+        return f"Dual({self.val}, {self.der})"
+
+
+def _real_power(base, exponent):
+    """Returns True if base ** exponent and its derivative are finite real floats in Python"""
+    if base < 0:
+        return float(exponent).is_integer()
+    if base == 0:
+        return exponent >= 1
+    return True
@@ -0,0 +1,368 @@
+import numpy as np
+from autodiffcc.core import _OPERATOR_UFUNCS, _array_ufunc, _axes, _get_variables, _operator
+
+
+def _outer(a, b):
+    """Returns the outer product of two derivatives over their leading variable axis"""
+    return a[:, None] * b[None, :]
+
+
+class HyperDual():
+    """Create hyper-dual numbers that carry a value, its gradient and its Hessian.
+
+    Each operation applies the second-order chain rule, so evaluating a function on
+    HyperDual inputs yields exact second derivatives in a single forward pass.
+
+    ATTRIBUTES
+    ==========
+    val : the value of the HyperDual object, can be scalar or array
+    der : the gradient, with the variables along the first axis
+    hess : the Hessian, with the variables along the first two axes
+
+    METHODS
+    =======
+    Overloads basic arithmetic operations, abs and the matrix product, and evaluates numpy
+    ufuncs such as np.sin and the functions np.sum, np.mean, np.dot and np.transpose.
+
+    EXAMPLES
+    ========
+    >>> x = HyperDual(3, n_vars=1, idx=0)
+    >>> f = x ** 3
+    >>> print(f.val, f.der, f.hess)
+    27.0 [27.] [[18.]]
+    """
+
+    # gives our operators priority over numpy's methods
+    __array_priority__ = 2
+
+    def __init__(self, val, **kwvars):
+        val = np.array(val).astype(float)
+        if 'der' in kwvars:
+            if 'n_vars' in kwvars or 'idx' in kwvars:
+                raise ValueError('Either specify der and hess or n_vars and idx, but not both')
+            self.der = np.array(kwvars['der']).astype(float)
+            if 'hess' in kwvars:
+                self.hess = np.array(kwvars['hess']).astype(float)
+            else:
+                self.hess = np.zeros(self.der.shape[:1] + self.der.shape)
+        else:
+            if 'n_vars' not in kwvars or 'idx' not in kwvars:
+                raise KeyError("If der isn't specified, need to specify n_vars and idx")
+            n_vars = kwvars['n_vars']
+            self.der = np.zeros((n_vars,) + val.shape)
+            self.der[kwvars['idx']] = 1.0
+            self.hess = np.zeros((n_vars, n_vars) + val.shape)
+        self.val = val
+
+    def _chain(self, val, der, der2):
+        """Returns f(self) given val = f(self.val), der = f'(self.val) and der2 = f''(self.val)"""
+        return HyperDual(val, der=der * self.der,
+                         hess=der * self.hess + der2 * _outer(self.der, self.der))
+
+    def __pos__(self):
+        """Returns the unary positive operator on self"""
+        return self
+
+    def __neg__(self):
+        """Returns the unary negative operator on self
+
+        EXAMPLES
+        =========
+        >>> -HyperDual(3, n_vars=1, idx=0)
+        (array(-3.), array([-1.]), array([[-0.]]))
+        """
+        return HyperDual(-self.val, der=-self.der, hess=-self.hess)
+
+    def __add__(self, other):
+        """Returns the sum of self and other
+
+        EXAMPLES
+        =========
+        >>> HyperDual(3, n_vars=1, idx=0) + 3
+        (array(6.), array([1.]), array([[0.]]))
+        """
+        if isinstance(other, HyperDual):
+            return HyperDual(self.val + other.val, der=self.der + other.der, hess=self.hess + other.hess)
+        return HyperDual(self.val + other, der=self.der, hess=self.hess)
+
+    def __radd__(self, other):
+        """Returns the reflected sum of self and other"""
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """Returns the difference of self and other"""
+        if isinstance(other, HyperDual):
+            return HyperDual(self.val - other.val, der=self.der - other.der, hess=self.hess - other.hess)
+        return HyperDual(self.val - other, der=self.der, hess=self.hess)
+
+    def __rsub__(self, other):
+        """Returns the reflected difference of self and other"""
+        return HyperDual(other - self.val, der=-self.der, hess=-self.hess)
+
+    def __mul__(self, other):
+        """Returns the product of self and other
+
+        EXAMPLES
+        =========
+        >>> x = HyperDual(3, n_vars=2, idx=0)
+        >>> y = HyperDual(4, n_vars=2, idx=1)
+        >>> (x * y).hess
+        array([[0., 1.],
+               [1., 0.]])
+        """
+        if isinstance(other, HyperDual):
+            cross = _outer(self.der, other.der)
+            return HyperDual(self.val * other.val,
+                             der=self.val * other.der + other.val * self.der,
+                             hess=self.val * other.hess + other.val * self.hess + cross + np.swapaxes(cross, 0, 1))
+        return HyperDual(self.val * other, der=other * self.der, hess=other * self.hess)
+
+    def __rmul__(self, other):
+        """Returns the reflected product of self and other"""
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """Returns the quotient of self and other"""
+        if isinstance(other, HyperDual):
+            return self * other._chain(1 / other.val, -1 / other.val ** 2, 2 / other.val ** 3)
+        return HyperDual(self.val / other, der=self.der / other, hess=self.hess / other)
+
+    def __rtruediv__(self, other):
+        """Returns the reflected quotient of self and other"""
+        return other * self._chain(1 / self.val, -1 / self.val ** 2, 2 / self.val ** 3)
+
+    def __pow__(self, other):
+        """Returns self to the power of other
+
+        EXAMPLES
+        =========
+        >>> (HyperDual(3, n_vars=1, idx=0) ** 2).hess
+        array([[2.]])
+        """
+        if isinstance(other, HyperDual):
+            a, b = self.val, other.val
+            val = a ** b
+            # the derivatives with respect to the exponent vanish where the base is 0
+            log_a = np.log(np.abs(np.where(a == 0, 1.0, a)))
+            f_a = b * a ** (b - 1)
+            f_b = val * log_a
+            f_aa = b * (b - 1) * a ** (b - 2)
+            f_ab = a ** (b - 1) * (1 + b * log_a)
+            f_bb = f_b * log_a
+            cross = _outer(self.der, other.der)
+            return HyperDual(val, der=f_a * self.der + f_b * other.der,
+                             hess=(f_a * self.hess + f_b * other.hess + f_aa * _outer(self.der, self.der)
+                                   + f_ab * (cross + np.swapaxes(cross, 0, 1)) + f_bb * _outer(other.der, other.der)))
+        return self._chain(self.val ** other, other * self.val ** (other - 1.0),
+                           other * (other - 1.0) * self.val ** (other - 2.0))
+
+    def __rpow__(self, other):
+        """Returns other to the power of self"""
+        other = np.asarray(other, dtype=float)
+        val = other ** self.val
+        log_base = np.log(np.abs(np.where(other == 0, 1.0, other)))
+        return self._chain(val, val * log_base, val * log_base ** 2)
+
+    def __abs__(self):
+        """Returns the absolute value of self, whose derivative is taken as 0 at 0
+
+        EXAMPLES
+        =========
+        >>> abs(HyperDual(-3, n_vars=1, idx=0))
+        (array(3.), array([-1.]), array([[0.]]))
+        """
+        # |x| is linear on either side of 0, so its second derivative vanishes
+        return self._chain(np.abs(self.val), np.sign(self.val), np.zeros(self.val.shape))
+
+    def __matmul__(self, other):
+        """Returns the matrix product of self and other
+
+        EXAMPLES
+        =========
+        >>> x = HyperDual([1, 2], n_vars=1, idx=0)
+        >>> (x @ x).hess
+        array([[4.]])
+        """
+        return _matmul(self, other)
+
+    def __rmatmul__(self, other):
+        """Returns the reflected matrix product of self and other"""
+        return _matmul(other, self)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Evaluates numpy ufuncs such as np.sin or np.add on HyperDual objects through
+        the HyperDual operators and ADmath functions"""
+        if ufunc in _HYPERDUAL_OPERATORS and method == '__call__' and not kwargs:
+            return _HYPERDUAL_OPERATORS[ufunc](*inputs)
+        return _array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Evaluates numpy functions such as np.sum or np.dot on HyperDual objects"""
+        if func not in _HYPERDUAL_FUNCTIONS:
+            return NotImplemented
+        return _HYPERDUAL_FUNCTIONS[func](*args, **kwargs)
+
+    def __eq__(self, other):
+        """Returns True if self and other have the same value"""
+        try:
+            return self.val == other.val
+        except AttributeError:
+            return self.val == other
+
+    def __gt__(self, other):
+        """Returns True if self's value is greater than other's value"""
+        try:
+            return self.val > other.val
+        except AttributeError:
+            return self.val > other
+
+    def __ge__(self, other):
+        """Returns True if self's value is greater than or equal to other's value"""
+        return (self > other) | (self == other)
+
+    def __lt__(self, other):
+        """Returns True if self's value is less than other's value"""
+        try:
+            return self.val < other.val
+        except AttributeError:
+            return self.val < other
+
+    def __le__(self, other):
+        """Returns True if self's value is less than or equal to other's value"""
+        return (self < other) | (self == other)
+
+    def __repr__(self):
+        return str((self.val, self.der, self.hess))
+
+
+# binary ufuncs evaluated by the HyperDual operators
+_HYPERDUAL_OPERATORS = {ufunc: _operator(name, reflected_name, HyperDual)
+                        for ufunc, name, reflected_name in _OPERATOR_UFUNCS}
+
+
+def _matmul(a, b):
+    """Returns the matrix product of a and b, either of which may be a HyperDual object
+
+    The derivative axes act as batch axes of np.matmul. 1-D factors are promoted to a
+    row and a column, as np.matmul does, and the added axes are dropped at the end.
+    """
+    def promote(obj, axis):
+        """Returns the value, gradient and Hessian of obj with 1-D values made matrices"""
+        if isinstance(obj, HyperDual):
+            val, der, hess = obj.val, obj.der, obj.hess
+        else:
+            val = np.asarray(obj, dtype=float)
+            der = hess = None
+        if val.ndim == 1:
+            val = np.expand_dims(val, axis)
+            der = None if der is None else np.expand_dims(der, axis)
+            hess = None if hess is None else np.expand_dims(hess, axis)
+        return val, der, hess
+
+    a_val, a_der, a_hess = promote(a, -2)
+    b_val, b_der, b_hess = promote(b, -1)
+    val = np.matmul(a_val, b_val)
+    der = 0
+    hess = 0
+    if a_der is not None:
+        der = der + np.matmul(a_der, b_val)
+        hess = hess + np.matmul(a_hess, b_val)
+    if b_der is not None:
+        der = der + np.matmul(a_val, b_der)
+        hess = hess + np.matmul(a_val, b_hess)
+    if a_der is not None and b_der is not None:
+        cross = np.matmul(a_der[:, None], b_der[None, :])
+        hess = hess + cross + np.swapaxes(cross, 0, 1)
+
+    # drop the axes that the 1-D factors gained
+    dropped = tuple(axis for axis, obj in ((-1, b), (-2, a)) if np.ndim(getattr(obj, 'val', obj)) == 1)
+    if dropped:
+        val, der, hess = (np.squeeze(array, axis=dropped) for array in (val, der, hess))
+    return HyperDual(val, der=der, hess=hess)
+
+
+def _sum(a, axis=None, keepdims=False):
+    """Returns the sum of the values of a HyperDual object over axis"""
+    axes = _axes(axis, np.ndim(a.val))
+    # value axis k is axis k + 1 of the gradient and k + 2 of the Hessian
+    return HyperDual(np.sum(a.val, axis=axes, keepdims=keepdims),
+                     der=np.sum(a.der, axis=tuple(ax + 1 for ax in axes), keepdims=keepdims),
+                     hess=np.sum(a.hess, axis=tuple(ax + 2 for ax in axes), keepdims=keepdims))
+
+
+def _mean(a, axis=None, keepdims=False):
+    """Returns the mean of the values of a HyperDual object over axis"""
+    count = 1
+    for ax in _axes(axis, np.ndim(a.val)):
+        count *= np.shape(a.val)[ax]
+    return _sum(a, axis, keepdims) / count
+
+
+def _transpose(a, axes=None):
+    """Returns a HyperDual object with the axes of its value permuted"""
+    if axes is None:
+        axes = tuple(reversed(range(np.ndim(a.val))))
+    return HyperDual(np.transpose(a.val, axes),
+                     der=np.transpose(a.der, (0,) + tuple(ax + 1 for ax in axes)),
+                     hess=np.transpose(a.hess, (0, 1) + tuple(ax + 2 for ax in axes)))
+
+
+def _dot(a, b):
+    """Returns the dot product of a and b, either of which may be a HyperDual object"""
+    if np.ndim(getattr(a, 'val', a)) == 0 or np.ndim(getattr(b, 'val', b)) == 0:
+        return a * b
+    return _matmul(a, b)
+
+
+# numpy functions that HyperDual objects implement
+_HYPERDUAL_FUNCTIONS = {np.sum: _sum, np.mean: _mean, np.transpose: _transpose, np.dot: _dot, np.matmul: _matmul}
+
+
+def hessian(base_func):
+    """Returns a function that takes as input a value and returns the Hessian of
+    base_func evaluated at the value
+
+    INPUTS
+    =======
+    base_func: a function that uses autodiffcc math functions to create an output
+
+    RETURNS
+    ========
+    a function that takes as input a value and returns the Hessian of base_func
+        evaluated at the value: an (n_vars, n_vars) array for a scalar function, or
+        an (n_outputs, n_vars, n_vars) array for a vector function
+
+    NOTES
+    =====
+    The Hessian is computed exactly in one forward pass with HyperDual numbers.
+    For vector inputs the trailing axes hold the Hessian at each point.
+
+    EXAMPLES
+    =========
+    >>> def f(x, y):
+    ...     return x ** 2 * y
+    >>> hessian(f)(x=1, y=3)
+    array([[6., 2.],
+           [2., 0.]])
+    """
+    def base_func_hess(*posvars, **kwvars):
+        variables = _get_variables(base_func, posvars, kwvars)
+        n_vars = len(variables)
+        # every variable shares one shape so that their derivatives can be multiplied together
+        variables = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in variables])
+        shape = variables[0].shape
+        variables = [HyperDual(value, n_vars=n_vars, idx=i) for i, value in enumerate(variables)]
+
+        # run base_func on input values now keeping track of second derivatives
+        result = base_func(*variables)
+
+        if isinstance(result, HyperDual):
+            return result.hess
+        if np.isscalar(result):
+            return np.zeros((n_vars, n_vars) + shape)
+
+        # if base_func is vector function, stack the Hessian of each output
+        return np.array([output.hess if isinstance(output, HyperDual) else np.zeros((n_vars, n_vars) + shape)
+                         for output in result])
+
+    return base_func_hess
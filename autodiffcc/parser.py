@@ -1,7 +1,15 @@
+import functools
+import re
 from autodiffcc.core import AD
 from autodiffcc.ADmath import *
 from autodiffcc.Equation import Expression
 
+# number of distinct expressions kept parsed by expressioncc
+CACHE_SIZE = 512
+
+# the start of a call to log, but not of a longer name such as logistic
+_LOG_CALL = re.compile(r'\blog\s*\(')
+
 
 class expressioncc():
     """
@@ -28,35 +36,30 @@ class expressioncc():
   """
 
     def __init__(self, line, fn_vars):
-        self.line = line
-        self.log_parsing()
-        self.equation_parsing()
         self.fn_vars = fn_vars
-        self.fn = Expression(self.line, self.fn_vars)
+        self.line, fn = _parse(' '.join(line.split()), tuple(fn_vars))
+        # a copy, so that changes to this function do not reach the cache
+        self.fn = Expression(fn)
 
     def equation_parsing(self):
         """Returns left - right if string is equation
     
     EXAMPLES
     =========
-    >>> self.line = 'sin(x) = x'
-    # after parsing
-    >>> self.line = 'sin(x) - x'
+    >>> expressioncc('sin(x) = x', ['x']).line
+    'sin(x) -( x)'
     """
-        if '=' in self.line:
-            self.line = self.line.replace('=', '-(') + ')'
+        self.line = _equation_parsing(self.line)
 
     def log_parsing(self):
         """parsing results of log
     
     EXAMPLES
     =========
-    >>> self.line = 'log(x,2) + 5'
-    # after parsing
-    >>> self.line = '(x log 2) + 5'
+    >>> expressioncc('log(x,2) + 5', ['x']).line
+    '(x log 2) + 5'
     """
-        self.line = self.line.replace('log', '')
-        self.line = self.line.replace(',', ' log ')
+        self.line = _log_parsing(self.line)
 
     def get_fn(self):
         """Returns function of the expression
@@ -69,6 +72,68 @@ class expressioncc():
     =========
     >>> fn = expressioncc('3 * log(x,2) + sin(7)', ['x']).get_fn()
     >>> fn(AD(4, n_vars=1)) 
-    (array(6.6569866), array([1.08202128]))
+    (6.656986598718789, array([1.08202128]))
     """
         return self.fn
+
+
+def _log_parsing(line):
+    """Returns line with log(x,b) rewritten as the operator (x log b)
+
+    Only the comma of a log call is rewritten, so that the commas of functions with
+    several arguments, such as primitives, are left to the Equation parser.
+    """
+    match = _LOG_CALL.search(line)
+    while match:
+        depth, comma, end = 1, None, match.end()
+        while depth and end < len(line):
+            if line[end] == '(':
+                depth += 1
+            elif line[end] == ')':
+                depth -= 1
+            elif line[end] == ',' and depth == 1:
+                comma = end
+            end += 1
+        if comma is None:
+            line = line[:match.start()] + '(' + line[match.end():]
+        else:
+            line = line[:match.start()] + '(' + line[match.end():comma] + ' log ' + line[comma + 1:]
+        match = _LOG_CALL.search(line, match.start())
+    return line
+
+
+def _equation_parsing(line):
+    """Returns left - right if line is an equation, else line"""
+    if '=' in line:
+        return line.replace('=', '-(') + ')'
+    return line
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _parse(line, fn_vars):
+    """Returns the rewritten line and its parsed Expression, cached on the line and variable order
+
+    functools.lru_cache is thread-safe, evicts the least recently used expression
+    once CACHE_SIZE are cached and counts hits and misses.
+    """
+    line = _equation_parsing(_log_parsing(line))
+    return line, Expression(line, list(fn_vars))
+
+
+def cache_info():
+    """Returns the hits, misses, maximum size and current size of the cache of parsed expressions
+
+    EXAMPLES
+    =========
+    >>> cache_clear()
+    >>> fn = expressioncc('x + 1', ['x']).get_fn()
+    >>> fn = expressioncc('x  +  1', ['x']).get_fn()
+    >>> cache_info()
+    CacheInfo(hits=1, misses=1, maxsize=512, currsize=1)
+    """
+    return _parse.cache_info()
+
+
+def cache_clear():
+    """Empties the cache of parsed expressions and resets its counters"""
+    _parse.cache_clear()
@@ -0,0 +1,492 @@
+import numpy as np
+from autodiffcc.core import _OPERATOR_UFUNCS, _array_ufunc, _axes, _get_inputs, _get_variables, _operator
+
+
+def _unbroadcast(adjoint, shape):
+    """Sums adjoint over the axes that were broadcast to reach it from shape
+
+    INPUTS
+    =======
+    adjoint: numpy array, the adjoint of a broadcast result
+    shape: the shape of the value that was broadcast
+
+    RETURNS
+    ========
+    adjoint reduced to shape
+
+    EXAMPLES
+    =========
+    >>> _unbroadcast(np.ones(3), ())
+    3.0
+    """
+    adjoint = np.asarray(adjoint)
+    if adjoint.shape == shape:
+        return adjoint
+    # sum over leading axes that were added by broadcasting
+    while adjoint.ndim > len(shape):
+        adjoint = adjoint.sum(axis=0)
+    # sum over axes that were stretched from length 1
+    for axis, length in enumerate(shape):
+        if length == 1 and adjoint.shape[axis] != 1:
+            adjoint = adjoint.sum(axis=axis, keepdims=True)
+    return adjoint
+
+
+def _sweep(tape, seeds):
+    """Propagates adjoints backwards through every Node on tape
+
+    INPUTS
+    =======
+    tape: list of Nodes in the order they were created
+    seeds: list of (Node, adjoint) pairs that start the sweep
+
+    NOTES
+    =====
+    The local partial derivative of a parent is either multiplied elementwise with the
+    adjoint, or, for operations such as matrix products and sums that mix entries, a
+    function that returns the parent's adjoint from the adjoint of the result.
+    """
+    for node in tape:
+        node.adj = 0.0
+    for node, seed in seeds:
+        node.adj = node.adj + seed * np.ones(node.val.shape)
+    for node in reversed(tape):
+        if np.isscalar(node.adj) and node.adj == 0:
+            continue
+        for parent, partial in node.parents:
+            # a partial is either an elementwise factor or a function mapping the adjoint
+            contribution = partial(node.adj) if callable(partial) else partial * node.adj
+            parent.adj = parent.adj + _unbroadcast(contribution, parent.val.shape)
+
+
+class Node():
+    """Create reverse-mode AD nodes that record each operation on a tape.
+
+    Unlike AD, a Node does not carry a derivative vector. Each operation stores
+    its result on the tape together with the local partial derivatives with
+    respect to its operands, and the full gradient is recovered afterwards by
+    a single backward sweep over the tape.
+
+    ATTRIBUTES
+    ==========
+    val : the value of the Node, can be scalar or array
+    tape : list of Nodes in the order they were created
+    parents : tuple of (Node, local partial derivative) pairs, where a partial derivative
+        is an elementwise factor or a function of the adjoint
+    adj : the adjoint of the Node, filled in by the backward sweep
+
+    METHODS
+    =======
+    Overloads basic arithmetic operations, abs and the matrix product, and evaluates numpy
+    ufuncs such as np.sin and the functions np.sum, np.mean, np.dot and np.transpose.
+
+    EXAMPLES
+    ========
+    >>> tape = []
+    >>> x = Node(3, tape)
+    >>> f = 3 * x - 4
+    >>> f.backward()
+    >>> x.adj
+    3.0
+    """
+
+    # gives our operators priority over numpy's methods
+    __array_priority__ = 2
+
+    def __init__(self, val, tape=None, parents=()):
+        self.val = np.array(val).astype(float)
+        self.tape = [] if tape is None else tape
+        self.parents = parents
+        self.adj = 0.0
+        self.tape.append(self)
+
+    def _chain(self, val, der):
+        """Returns a new Node with value val that depends on self with local derivative der"""
+        return Node(val, self.tape, ((self, der),))
+
+    def backward(self, seed=1.0):
+        """Propagates adjoints from self back to every Node on its tape
+
+        INPUTS
+        =======
+        self: Node object, typically the output of a function
+        seed: the adjoint of self, defaults to 1
+
+        EXAMPLES
+        =========
+        >>> tape = []
+        >>> x = Node(2, tape)
+        >>> y = x * x
+        >>> y.backward()
+        >>> x.adj
+        4.0
+        """
+        _sweep(self.tape, [(self, seed)])
+
+    def __pos__(self):
+        """Returns the unary positive operator on self
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> +x
+        Node(3.0)
+        """
+        return self
+
+    def __neg__(self):
+        """Returns the unary negative operator on self
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> -x
+        Node(-3.0)
+        """
+        return self._chain(-self.val, -1.0)
+
+    def __add__(self, other):
+        """Returns the sum of self and other
+
+        INPUTS
+        =======
+        self: Node object
+        other: Node object or regular number/numpy array
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> x + 3
+        Node(6.0)
+        """
+        if isinstance(other, Node):
+            return Node(self.val + other.val, self.tape, ((self, 1.0), (other, 1.0)))
+        return self._chain(self.val + other, 1.0)
+
+    def __radd__(self, other):
+        """Returns the reflected sum of self and other"""
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """Returns the difference of self and other
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> x - 3
+        Node(0.0)
+        """
+        if isinstance(other, Node):
+            return Node(self.val - other.val, self.tape, ((self, 1.0), (other, -1.0)))
+        return self._chain(self.val - other, 1.0)
+
+    def __rsub__(self, other):
+        """Returns the reflected difference of self and other"""
+        return self._chain(other - self.val, -1.0)
+
+    def __mul__(self, other):
+        """Returns the product of self and other
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> x * 3
+        Node(9.0)
+        """
+        if isinstance(other, Node):
+            return Node(self.val * other.val, self.tape, ((self, other.val), (other, self.val)))
+        return self._chain(self.val * other, other)
+
+    def __rmul__(self, other):
+        """Returns the reflected product of self and other"""
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """Returns the quotient of self and other
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> x / 3
+        Node(1.0)
+        """
+        if isinstance(other, Node):
+            val = self.val / other.val
+            return Node(val, self.tape, ((self, 1 / other.val), (other, -val / other.val)))
+        return self._chain(self.val / other, 1 / np.asarray(other, dtype=float))
+
+    def __rtruediv__(self, other):
+        """Returns the reflected quotient of self and other"""
+        val = other / self.val
+        return self._chain(val, -val / self.val)
+
+    def __pow__(self, other):
+        """Returns self to the power of other
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> x ** 2
+        Node(9.0)
+        """
+        if isinstance(other, Node):
+            val = self.val ** other.val
+            # the derivative with respect to the exponent vanishes where the base is 0
+            log_base = np.log(np.abs(np.where(self.val == 0, 1.0, self.val)))
+            return Node(val, self.tape, ((self, other.val * self.val ** (other.val - 1)),
+                                         (other, val * log_base)))
+        return self._chain(self.val ** other, other * self.val ** (other - 1.0))
+
+    def __rpow__(self, other):
+        """Returns other to the power of self
+
+        EXAMPLES
+        =========
+        >>> x = Node(3)
+        >>> 2 ** x
+        Node(8.0)
+        """
+        other = np.asarray(other, dtype=float)
+        val = other ** self.val
+        log_base = np.log(np.abs(np.where(other == 0, 1.0, other)))
+        return self._chain(val, val * log_base)
+
+    def __abs__(self):
+        """Returns the absolute value of self, whose derivative is taken as 0 at 0
+
+        EXAMPLES
+        =========
+        >>> x = Node(-3)
+        >>> abs(x)
+        Node(3.0)
+        """
+        return self._chain(np.abs(self.val), np.sign(self.val))
+
+    def __matmul__(self, other):
+        """Returns the matrix product of self and other
+
+        EXAMPLES
+        =========
+        >>> x = Node([1, 2])
+        >>> x @ np.array([[1, 0], [0, 3]])
+        Node([1. 6.])
+        """
+        return _matmul(self, other)
+
+    def __rmatmul__(self, other):
+        """Returns the reflected matrix product of self and other"""
+        return _matmul(other, self)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Evaluates numpy ufuncs such as np.sin or np.add on Nodes through the
+        Node operators and ADmath functions"""
+        if ufunc in _NODE_OPERATORS and method == '__call__' and not kwargs:
+            return _NODE_OPERATORS[ufunc](*inputs)
+        return _array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Evaluates numpy functions such as np.sum or np.dot on Nodes"""
+        if func not in _NODE_FUNCTIONS:
+            return NotImplemented
+        return _NODE_FUNCTIONS[func](*args, **kwargs)
+
+    def __eq__(self, other):
+        """Returns True if self and other have the same value"""
+        if isinstance(other, Node):
+            return self.val == other.val
+        return self.val == other
+
+    def __gt__(self, other):
+        """Returns True if self's value is greater than other's value"""
+        if isinstance(other, Node):
+            return self.val > other.val
+        return self.val > other
+
+    def __ge__(self, other):
+        """Returns True if self's value is greater than or equal to other's value"""
+        return (self > other) | (self == other)
+
+    def __lt__(self, other):
+        """Returns True if self's value is less than other's value"""
+        if isinstance(other, Node):
+            return self.val < other.val
+        return self.val < other
+
+    def __le__(self, other):
+        """Returns True if self's value is less than or equal to other's value"""
+        return (self < other) | (self == other)
+
+    def __repr__(self):
+        return f"Node({self.val})"
+
+
+# binary ufuncs evaluated by the Node operators
+_NODE_OPERATORS = {ufunc: _operator(name, reflected_name, Node) for ufunc, name, reflected_name in _OPERATOR_UFUNCS}
+
+
+def _matmul(a, b):
+    """Returns the matrix product of a and b, either of which may be a Node
+
+    The adjoint of a is the adjoint of the result times b transposed, and the adjoint
+    of b is a transposed times the adjoint of the result, with 1-D factors treated as
+    a row and a column as np.matmul does.
+    """
+    a_val = a.val if isinstance(a, Node) else np.asarray(a, dtype=float)
+    b_val = b.val if isinstance(b, Node) else np.asarray(b, dtype=float)
+    # 1-D factors as matrices, so that the adjoints are matrix products too
+    a_mat = a_val[np.newaxis] if a_val.ndim == 1 else a_val
+    b_mat = b_val[:, np.newaxis] if b_val.ndim == 1 else b_val
+
+    def as_matrix(adjoint):
+        """Returns the adjoint of the result with the axes that 1-D factors dropped"""
+        adjoint = np.asarray(adjoint)
+        if b_val.ndim == 1:
+            adjoint = adjoint[..., np.newaxis]
+        if a_val.ndim == 1:
+            adjoint = adjoint[..., np.newaxis, :]
+        return adjoint
+
+    def a_adjoint(adjoint):
+        product = np.matmul(as_matrix(adjoint), np.swapaxes(b_mat, -1, -2))
+        return product[..., 0, :] if a_val.ndim == 1 else product
+
+    def b_adjoint(adjoint):
+        product = np.matmul(np.swapaxes(a_mat, -1, -2), as_matrix(adjoint))
+        return product[..., 0] if b_val.ndim == 1 else product
+
+    parents = tuple(pair for pair in ((a, a_adjoint), (b, b_adjoint)) if isinstance(pair[0], Node))
+    return Node(np.matmul(a_val, b_val), parents[0][0].tape, parents)
+
+
+def _sum(a, axis=None, keepdims=False):
+    """Returns the sum of the values of a Node over axis"""
+    axes = _axes(axis, np.ndim(a.val))
+
+    def adjoint_of_a(adjoint):
+        # every summed entry receives the adjoint of the sum
+        if not keepdims:
+            adjoint = np.expand_dims(adjoint, axes)
+        return np.broadcast_to(adjoint, a.val.shape)
+
+    return a._chain(np.sum(a.val, axis=axes, keepdims=keepdims), adjoint_of_a)
+
+
+def _mean(a, axis=None, keepdims=False):
+    """Returns the mean of the values of a Node over axis"""
+    count = 1
+    for ax in _axes(axis, np.ndim(a.val)):
+        count *= np.shape(a.val)[ax]
+    return _sum(a, axis, keepdims) / count
+
+
+def _transpose(a, axes=None):
+    """Returns a Node with the axes of its value permuted"""
+    if axes is None:
+        axes = tuple(reversed(range(np.ndim(a.val))))
+    # the adjoint is permuted back with the inverse permutation
+    return a._chain(np.transpose(a.val, axes), lambda adjoint: np.transpose(adjoint, np.argsort(axes)))
+
+
+def _dot(a, b):
+    """Returns the dot product of a and b, either of which may be a Node"""
+    if np.ndim(getattr(a, 'val', a)) == 0 or np.ndim(getattr(b, 'val', b)) == 0:
+        return a * b
+    return _matmul(a, b)
+
+
+# numpy functions that Nodes implement
+_NODE_FUNCTIONS = {np.sum: _sum, np.mean: _mean, np.transpose: _transpose, np.dot: _dot, np.matmul: _matmul}
+
+
+def gradient(base_func):
+    """Returns a function that takes as input a value and returns the gradient of
+    the scalar function base_func evaluated at the value, computed in reverse mode
+
+    INPUTS
+    =======
+    base_func: a scalar function that uses autodiffcc math functions to create an output
+
+    RETURNS
+    ========
+    a function that takes as input a value and returns the gradient of base_func
+        evaluated at the value as a 1-D array with one entry per variable
+
+    NOTES
+    =====
+    The cost of the backward sweep does not depend on the number of variables, so
+    gradient is preferable to differentiate for functions with many inputs and a
+    single output. For vector inputs the gradient holds the partial derivative with
+    respect to every entry, the inputs flattened and concatenated in the order of
+    base_func's signature. This matches the row of differentiate for elementwise
+    functions only, as differentiate treats a vector input as one variable and
+    returns the derivative along all of its entries at once through a reduction.
+
+    EXAMPLES
+    =========
+    >>> from autodiffcc.ADmath import sin
+    >>> def f(x, y):
+    ...     return x * y + sin(x)
+    >>> gradient(f)(x=0, y=2)
+    array([3., 0.])
+    """
+    def base_func_grad(*posvars, **kwvars):
+        tape = []
+        variables = [Node(value, tape) for value in _get_variables(base_func, posvars, kwvars)]
+
+        # run base_func on input values now recording each operation on the tape
+        result = base_func(*variables)
+
+        if not isinstance(result, Node):
+            if np.isscalar(result) or np.ndim(result) == 0:
+                return np.zeros(np.concatenate([np.ravel(var.val) for var in variables]).shape)
+            raise ValueError("gradient requires base_func to return a scalar, use differentiate for vector functions")
+
+        result.backward()
+        return np.concatenate([np.ravel(var.adj * np.ones(var.val.shape)) for var in variables])
+
+    return base_func_grad
+
+
+def vjp(base_func, x, u):
+    """Returns the product of the weights u with the Jacobian of base_func at x,
+    computed with a single reverse sweep
+
+    INPUTS
+    =======
+    base_func: a function that uses autodiffcc math functions to create an output
+    x: list of values, or dict of values keyed by variable name, at which the
+        Jacobian is evaluated
+    u: list with one weight per output of base_func, or a number for a scalar function
+
+    RETURNS
+    ========
+    a 1-D array with one entry per variable, equal to u @ differentiate(base_func)(*x)
+
+    NOTES
+    =====
+    Every output is seeded with its weight and the adjoints are propagated in one
+    backward sweep over the shared tape, so the cost of vjp does not grow with the
+    number of outputs.
+
+    EXAMPLES
+    =========
+    >>> def f(x, y):
+    ...     return x * y, x + y
+    >>> vjp(f, [2, 3], [1, 1])
+    array([4., 3.])
+    """
+    tape = []
+    variables = [Node(value, tape) for value in _get_inputs(base_func, x)]
+
+    # run base_func on input values now recording each operation on the tape
+    result = base_func(*variables)
+
+    if np.isscalar(result) or isinstance(result, Node):
+        result = [result]
+    if np.ndim(u) == 0:
+        u = [u]
+    if len(u) != len(result):
+        raise ValueError("u must have one entry per output of base_func")
+
+    _sweep(tape, [(output, weight) for output, weight in zip(result, u) if isinstance(output, Node)])
+    return np.concatenate([np.ravel(var.adj * np.ones(var.val.shape)) for var in variables])
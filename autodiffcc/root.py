@@ -1,8 +1,9 @@
+import functools
 import inspect
-import matplotlib.pyplot as plt
+import math
+import warnings
 import numpy as np
-import itertools
-from autodiffcc.core import differentiate
+from autodiffcc.core import AD, value_and_jacobian
 
 
 def _check_start_values(start_values, signature):
@@ -152,126 +153,272 @@ def _bisect(function, interval_start, interval_end, max_iter, threshold, signatu
 
     NOTES
     =====
-    This function considers a value to be 0 if round(value, 15) == 0)
+    Each iteration evaluates function at the middle of the box and keeps the box spanned
+    by the middle and a corner of opposite sign. Corner values are cached: the 2^n
+    corners are evaluated once up front, and afterwards the two corners of each new box
+    whose signs are needed, the middle and the chosen corner, are already known, so
+    every iteration costs one evaluation of function.
     This function does not find all the roots. You can change the intervals to
     look for different roots.
+    This function neither plots nor prints, use plot_function to look at a function
+    of one variable before choosing an interval.
 
     EXAMPLES
     =========
-
+    >>> import inspect
     >>> def f(x, y):
-    >>>     return 2 * x * y - 2
-
-    >>> _bisect(f, interval_start = [-10, 10], interval_end = [-4, 10])
-    [0.12999772724065328, 7.692442177460448]
+    ...     return 2 * x * y - 2
+    >>> root = _bisect(f, [0, 0], [4, 4], 100, 1e-6, inspect.signature(f).parameters)
+    >>> abs(f(*root)) < 1e-5
+    True
     """
 
     # check how many parameters there are in the function
     nParam = len(signature)
 
-    # create a point array storing coordinates
+    ## example of corners
+    #           x    y
+    # corner 0  1    3
+    # corner 1  1    10
+    # corner 2  2    3
+    # corner 3  2    10
+    corners = np.array(np.meshgrid(*np.c_[interval_start, interval_end], indexing='ij')).reshape(nParam, -1).T
 
-    ## example of points
-    #    start-interval finish-interval
-    # x       1               2
-    # y       3               10
-    # z      -2               0
+    # check sign change
+    results = []
+    for corner in corners:
+        value = np.array(function(*corner), dtype=float)
+        # the first corner is interval_start, so its output tells the output dimension
+        if value.size > 1:
+            raise Exception("The bisection method only supports functions with a single output dimension.")
+        results.append(value.item())
+    signs = np.sign(results)
 
-    points = np.asarray(np.c_[interval_start, interval_end])
+    # detect sign change
+    signchange = np.ptp(signs) > 0
 
-    output_shape = len(np.array(function(*interval_start)).flatten())
+    # if signs are not different
+    if not signchange:
+        raise Exception(f"No change in sign, please try different intervals. Here are which indices change signs:{signchange}")
 
-    if output_shape > 1:
-        raise Exception("The bisection method only supports functions with a single output dimension.")
+    for i in range(2, max_iter):
+        # middle point
+        c = (corners[0] + corners[-1]) / 2
+        middle_value = np.array(function(*c), dtype=float).item()
 
-    #### PLOT if can do 2D graph
-    if nParam == 1:
-        # x axis values
-        a = interval_start
-        b = interval_end
-        interval = np.linspace(a, b, num=1000)
-        if np.abs(b - a) == 0 or np.abs(max(interval) - min(interval)) == 0:
-            raise Warning("Please choose a non-zero interval to see informative plot.")
+        # if found root:
+        if abs(middle_value) < threshold:
+            return list(c)  # return middle as the approximate root value
 
-        # Plot the points
-        fig, ax = plt.subplots(1, 1, subplot_kw={'title': 'Your function in the specified interval',
-                                                 'xlabel': 'Interval', 'ylabel': 'Values'})
-        ax.plot(interval, function(interval), color='green', linestyle='dashed', linewidth=0.5,
-                marker='o', markerfacecolor='blue', markersize=1)
-        ax.axhline(y=0)
-        plt.show()
+        # keep the last known corner whose sign is opposite to the middle's
+        opposite = np.flatnonzero(signs * np.sign(middle_value) < 0)
+        if len(opposite) == 0:
+            # the remaining corners are exact roots
+            return list(corners[np.flatnonzero(signs == 0)[0]])
+        corner = corners[opposite[-1]]
 
-    # get the starting points of each variable
-    # get the ending points for each variable
-    # get their combinations. Should be 4 different combinations
+        # the new box is spanned by the chosen corner and the middle, whose signs are both known
+        corners = np.array([corner, c])
+        signs = np.array([signs[opposite[-1]], np.sign(middle_value)])
 
-    matrix = np.empty((nParam, 2))
-    for p in range(0, nParam):
-        matrix[p] = points[p]
-    allpoints = list(itertools.product(*matrix))
+    raise Exception("Bisection did not converge, try increasing max_iter.")
 
-    # check sign change
-    results = []
-    for elements in allpoints:
-        results.append(function(*elements))
-        asign = np.sign(results)
-        # detect sign change
-        signchange = sum(((np.roll(asign, 1) - asign) != 0).astype(int)) > 0
 
-    # if signs are not different
-    if not np.array(signchange).all():
-        raise Exception(f"No change in sign, please try different intervals. Here are which indices change signs:{signchange}")
+def _factorize(jacobian, linear_solver):
+    """Returns a function that solves jacobian @ step = rhs for step
 
-    i = 1
-    # if signs are different
-    while np.array(signchange).all():
-        i = i + 1
-        if i >= max_iter:
-            raise Exception("Bisection did not converge, try increasing max_iter.")
-        # middle points
-        c = []
-        for k in range(0, nParam):
-            c.append((points[k][0] + points[k][1]) / 2)
+    INPUTS
+    =======
+    jacobian: The Jacobian of a vector function as a 2-D array
+    linear_solver: 'lu' to factorize square Jacobians once with LU, or 'pinv' to use the pseudo-inverse
 
-        middlePointResult = function(*c)
+    RETURNS
+    ========
+    A function of the right-hand side rhs that returns the step
 
-        # approx to 14ths decimal point
-        # if found root:
-        if _norm(middlePointResult) < threshold:
-            print("root found for ", c)
-            return (c)  # return middle as the approximate root value
-        # if did not find root yet:
-        else:
-            j = 0
+    NOTES
+    =====
+    With 'lu', singular and non-square Jacobians fall back to least squares, which gives
+    the same minimum-norm step as the pseudo-inverse. The returned function can be
+    called again on new right-hand sides without refactorizing. The LU factors come
+    from SciPy; without SciPy every call solves with np.linalg.solve instead.
+    """
+    if linear_solver == 'pinv':
+        inverse = np.linalg.pinv(jacobian)
+        return lambda rhs: np.matmul(inverse, rhs)
+
+    if jacobian.shape[0] == jacobian.shape[1]:
+        try:
+            from scipy.linalg import lu_factor, lu_solve
+        except ImportError:
+            return lambda rhs: _solve(jacobian, rhs)
+
+        with warnings.catch_warnings():
+            # a zero pivot is handled below by falling back to least squares
+            warnings.simplefilter('ignore')
+            factors = lu_factor(jacobian, check_finite=False)
+        if np.all(np.diag(factors[0]) != 0):
+            return lambda rhs: lu_solve(factors, rhs, check_finite=False)
+    return lambda rhs: np.linalg.lstsq(jacobian, rhs, rcond=None)[0]
+
+
+def _solve(matrix, rhs):
+    """Returns the solution of matrix @ x = rhs, or its least squares solution if matrix is singular"""
+    try:
+        return np.linalg.solve(matrix, rhs)
+    except np.linalg.LinAlgError:
+        return np.linalg.lstsq(matrix, rhs, rcond=None)[0]
+
+
+def _count_calls(function):
+    """Returns a wrapper of function that counts its calls in its n_calls attribute"""
+    @functools.wraps(function)
+    def counted(*args, **kwargs):
+        counted.n_calls += 1
+        return function(*args, **kwargs)
+
+    counted.n_calls = 0
+    return counted
+
+
+def _scalar_value(function, x):
+    """Returns function evaluated at x as a float, raising if it has more than one output"""
+    value = np.asarray(function(x), dtype=float)
+    if value.size != 1:
+        raise Exception("Brent's method only supports functions of one variable with a single output dimension.")
+    return float(value.item())
 
-            for n in results:
-                if (np.array(n) * np.array(middlePointResult) < 0).all():
-                    corner1 = list(allpoints[j])
-                    corner2 = c
-                j = j + 1
 
-            # update points for intervals
-            if corner1 > corner2:
-                points = np.asarray(np.c_[corner2, corner1])
+def _brent(function, interval_start, interval_end, threshold, max_iter):
+    """Returns a root of a scalar function of one variable found in an interval with Brent's method
+
+    INPUTS
+    =======
+    function: A function of one variable with a single output
+    interval_start: The start of the interval on which to find a root, as an array with one entry
+    interval_end: The end of the interval on which to find a root, as an array with one entry
+    threshold: Minimum threshold to declare convergence on a root
+    max_iter: Maximum number of iterations taken for the algorithm to converge
+
+    RETURNS
+    ========
+    A root of function as an array with one entry, or raised Exception if none is found
+
+    NOTES
+    =====
+    Each step tries inverse quadratic interpolation, or the secant method when only two
+    points are distinct, and falls back to bisection whenever the interpolated point
+    leaves the bracket or shrinks it too slowly. The root stays bracketed throughout,
+    and convergence is superlinear on smooth functions, so a root is typically found in
+    tens of evaluations. The search stops when the absolute value of function is below
+    threshold or the bracket cannot be narrowed further in floating point.
+
+    EXAMPLES
+    =========
+    >>> _brent(lambda x: (x + 2) * (x - 3), np.array([0]), np.array([5]), threshold=1e-8, max_iter=100)
+    array([3.])
+    """
+    if len(interval_start) != 1:
+        raise Exception("Brent's method only supports functions of one variable with a single output dimension.")
+    a, b = float(interval_start[0]), float(interval_end[0])
+    fa, fb = _scalar_value(function, a), _scalar_value(function, b)
+    if fa * fb > 0:
+        raise Exception("No change in sign, please try a different interval.")
+
+    # b is the best estimate, a the previous one and c the other end of the bracket
+    c, fc = b, fb
+    d = e = b - a
+    for i in range(max_iter):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        # relative tolerance of b, with a floor so that roots at 0 can be resolved
+        tolerance = np.finfo(float).eps * (2 * abs(b) + 1)
+        half_width = 0.5 * (c - b)
+        if abs(fb) < threshold or abs(half_width) <= tolerance:
+            return np.array([b])
+
+        if abs(e) >= tolerance and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                # secant step
+                p = 2 * half_width * s
+                q = 1 - s
+            else:
+                # inverse quadratic interpolation
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * half_width * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            # accept the interpolation only if it stays in the bracket and shrinks it quickly enough
+            if 2 * p < min(3 * half_width * q - abs(tolerance * q), abs(e * q)):
+                e = d
+                d = p / q
             else:
-                points = np.asarray(np.c_[corner1, corner2])
+                d = e = half_width
+        else:
+            d = e = half_width
+
+        a, fa = b, fb
+        b += d if abs(d) > tolerance else math.copysign(tolerance, half_width)
+        fb = _scalar_value(function, b)
+    raise Exception("Brent's method did not converge, try increasing max_iter.")
 
-            matrix = np.empty((nParam, 2))
 
-            for p in range(0, nParam):
-                matrix[p] = points[p]
-            allpoints = list(itertools.product(*matrix))
+def plot_function(function, interval, num=1000):
+    """Plots a function of one variable over an interval, to help choose an interval for find_root
+
+    INPUTS
+    =======
+    function: A function of one variable defined using the autodiffcc.ADmath methods
+    interval: The interval to plot, in any format accepted by find_root for a function of one variable
+    num: Number of points at which function is evaluated
 
-            # check sign change
-            results = []
-            for elements in allpoints:
-                results.append(function(*elements))
-                asign = np.sign(results)
-                # detect sign change
-                signchange = sum(((np.roll(asign, 1) - asign) != 0).astype(int)) > 0
+    RETURNS
+    ========
+    The matplotlib Axes holding the plot
 
+    NOTES
+    =====
+    This is a diagnostic kept separate from the root finders, which never plot. It calls
+    plt.show(), which blocks until the figure is closed with interactive backends.
+    matplotlib is imported on the first call, so importing autodiffcc does not load it.
 
-def _newton_raphson(function, values, threshold, max_iter):
+    EXAMPLES
+    =========
+    >>> ax = plot_function(lambda x: (x + 2) * (x - 3), [-5, 5])
+    """
+    signature = inspect.signature(function).parameters.keys()
+    interval_start, interval_end = _check_interval(interval=interval, signature=signature)
+    if len(signature) != 1:
+        raise Exception("Only functions of one variable can be plotted.")
+
+    # x axis values
+    a = interval_start[0]
+    b = interval_end[0]
+    if np.abs(b - a) == 0:
+        raise Warning("Please choose a non-zero interval to see informative plot.")
+    points = np.linspace(a, b, num=num)
+
+    # Plot the points
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(1, 1, subplot_kw={'title': 'Your function in the specified interval',
+                                             'xlabel': 'Interval', 'ylabel': 'Values'})
+    ax.plot(points, function(points), color='green', linestyle='dashed', linewidth=0.5,
+            marker='o', markerfacecolor='blue', markersize=1)
+    ax.axhline(y=0)
+    plt.show()
+    return ax
+
+
+def _newton_raphson(function, values, threshold, max_iter, linear_solver='lu', reuse_jacobian=1):
     """Returns a root found starting from values using the Newton-Raphson method
 
     INPUTS
@@ -280,37 +427,111 @@ def _newton_raphson(function, values, threshold, max_iter):
     values: Starting point for root-finding method as a scalar or vector
     threshold: Minimum threshold to declare convergence on a root
     max_iter: Maximum number of iterations taken for the algorithm to converge
+    linear_solver: 'lu' or 'pinv', how each Newton step is solved for a vector function
+    reuse_jacobian: Number of iterations each Jacobian and its factorization are used for
 
     RETURNS
     ========
     A root of function found starting from values or raised Exception if none are found
 
+    NOTES
+    =====
+    With reuse_jacobian greater than 1 this is the chord (Shamanskii) method: iterations
+    between Jacobian updates only evaluate function and reuse the factorization.
+
     EXAMPLES
     =========
     >>> _newton_raphson(lambda x, y: (2 * x + y, x - 1), values=np.array([1, 2]), threshold=1e-8, max_iter=2000)
     array([ 1., -2.])
     """
-    jacobian = differentiate(function)
+    # each evaluation gives the value and the Jacobian from one pass through function
+    value_and_der = value_and_jacobian(function)
+    function_values, jacobian_values = value_and_der(*values)
 
-    output_shape = len(np.array(function(*values)).flatten())
+    output_shape = len(np.array(function_values).flatten())
 
     for i in range(max_iter):
         flat_variables = values.flatten()
-        jacobian_values = jacobian(*values)
         if output_shape == 1:
             if jacobian_values == 0:
                 raise Exception("Newton-Raphson did not converge, try increasing max_iter or changing start_values.")
             else:
-                flat_variables = flat_variables - function(*values) / jacobian_values
+                flat_variables = flat_variables - function_values / jacobian_values
         else:
-            flat_variables = flat_variables - np.matmul(np.linalg.pinv(jacobian_values), function(*values))
+            if i % reuse_jacobian == 0:
+                solve = _factorize(jacobian_values, linear_solver)
+            flat_variables = flat_variables - solve(function_values)
         values = flat_variables.reshape(values.shape)
-        if _norm(function(*values)) < threshold:
+        if (i + 1) % reuse_jacobian == 0:
+            function_values, jacobian_values = value_and_der(*values)
+        else:
+            function_values = function(*values)
+        if _norm(function_values) < threshold:
             return values
     raise Exception("Newton-Raphson did not converge, try increasing max_iter or changing start_values.")
 
 
-def _newton_fourier(function, interval_start: np.ndarray, interval_end: np.ndarray, threshold, max_iter):
+def _broyden(function, values, threshold, max_iter, variant='good'):
+    """Returns a root found starting from values using Broyden's quasi-Newton method
+
+    INPUTS
+    =======
+    function: A function defined using the autodiffcc.ADmath methods
+    values: Starting point for root-finding method as a scalar or vector
+    threshold: Minimum threshold to declare convergence on a root
+    max_iter: Maximum number of iterations taken for the algorithm to converge
+    variant: 'good' or 'bad', the rank-one update applied to the inverse Jacobian
+
+    RETURNS
+    ========
+    A root of function found starting from values or raised Exception if none are found
+
+    NOTES
+    =====
+    The Jacobian is computed once with automatic differentiation and inverted. Every
+    iteration then evaluates only function and applies a rank-one update to the
+    inverse, using the Sherman-Morrison formula for the good variant, so each step
+    costs O(n^2) instead of an AD pass and an O(n^3) solve.
+
+    EXAMPLES
+    =========
+    >>> _broyden(lambda x, y: (2 * x + y, x - 1), values=np.array([1, 2]), threshold=1e-8, max_iter=2000)
+    array([ 1., -2.])
+    """
+    function_values, jacobian_values = value_and_jacobian(function)(*values)
+    function_values = np.asarray(function_values, dtype=float).flatten()
+    try:
+        inverse = np.linalg.inv(jacobian_values)
+    except np.linalg.LinAlgError:
+        inverse = np.linalg.pinv(jacobian_values)
+
+    flat_variables = values.flatten().astype(float)
+    for i in range(max_iter):
+        step = -inverse @ function_values
+        flat_variables = flat_variables + step
+        new_values = np.asarray(function(*flat_variables.reshape(values.shape)), dtype=float).flatten()
+        if _norm(new_values) < threshold:
+            return flat_variables.reshape(values.shape)
+        if not np.all(np.isfinite(new_values)):
+            break
+
+        change = new_values - function_values
+        function_values = new_values
+        inverse_change = inverse @ change
+        if variant == 'good':
+            # Sherman-Morrison update of the inverse for the rank-one update of the Jacobian
+            row = step @ inverse
+            denominator = row @ change
+        else:
+            row = change
+            denominator = change @ change
+        if denominator != 0:
+            inverse = inverse + np.outer(step - inverse_change, row) / denominator
+    raise Exception("Broyden did not converge, try increasing max_iter or changing start_values.")
+
+
+def _newton_fourier(function, interval_start: np.ndarray, interval_end: np.ndarray, threshold, max_iter,
+                    linear_solver='lu', reuse_jacobian=1):
     """Returns a root of the function found using the Newton-Fourier algorithm
 
     INPUTS
@@ -320,6 +541,8 @@ def _newton_fourier(function, interval_start: np.ndarray, interval_end: np.ndarr
     interval_end: The end of the initial interval of values on which to attempt to find a root, as an array
     threshold: Minimum threshold to declare convergence on a root
     max_iter: Maximum number of iterations taken for the algorithm to converge
+    linear_solver: 'lu' or 'pinv', how each Newton step is solved for a vector function
+    reuse_jacobian: Number of iterations each Jacobian and its factorization are used for
     
     RETURNS
     ========
@@ -337,7 +560,8 @@ def _newton_fourier(function, interval_start: np.ndarray, interval_end: np.ndarr
     x_vars = interval_start
     z_vars = interval_end
 
-    output_shape = len(np.array(function(*x_vars)).flatten())
+    # the value at x and the Jacobian shared by both iterates come from one pass through function
+    value_and_der = value_and_jacobian(function)
 
     # Starting values for x_0, z_0
     flat_x = x_vars.flatten()
@@ -345,19 +569,24 @@ def _newton_fourier(function, interval_start: np.ndarray, interval_end: np.ndarr
     # numerator of the limit for termination of Newton-Fourier
     limit_numerator = (x_vars.flatten() - z_vars.flatten()) ** 2
 
-    jacobian = differentiate(function)
-
     for i in range(max_iter):
+        if i % reuse_jacobian == 0:
+            x_values, common_jacobian = value_and_der(*x_vars)
+            # the number of outputs comes from this pass rather than from an extra call
+            output_shape = np.size(x_values)
+            if output_shape == 1:
+                if common_jacobian == 0:
+                    raise Exception("Newton-Fourier did not converge, try another interval or increasing max_iter.")
+            else:
+                solve = _factorize(common_jacobian, linear_solver)
+        else:
+            x_values = function(*x_vars)
         if output_shape == 1:
-            common_jacobian = jacobian(*x_vars)
-            if common_jacobian == 0:
-                raise Exception("Newton-Fourier did not converge, try another interval or increasing max_iter.")
-            flat_x = flat_x - function(*x_vars) / common_jacobian
+            flat_x = flat_x - x_values / common_jacobian
             flat_z = flat_z - function(*z_vars) / common_jacobian
         else:
-            common_jacobian = np.linalg.pinv(jacobian(*x_vars))
-            flat_x = flat_x - np.matmul(common_jacobian, function(*x_vars))
-            flat_z = flat_z - np.matmul(common_jacobian, function(*z_vars))
+            flat_x = flat_x - solve(x_values)
+            flat_z = flat_z - solve(function(*z_vars))
         limit_denominator = limit_numerator
         limit_numerator = flat_x - flat_z
 
@@ -377,24 +606,36 @@ def _newton_fourier(function, interval_start: np.ndarray, interval_end: np.ndarr
     raise Exception("Newton-Fourier did not converge, try another interval or increasing max_iter.")
 
 
-def find_root(function, start_values=None, interval=None, method='newton-raphson', threshold=1e-8, max_iter=2000):
+def find_root(function, start_values=None, interval=None, method=None, threshold=1e-8, max_iter=2000,
+              linear_solver='lu', reuse_jacobian=1, full_output=False):
     """Returns the root of a function defined using the autodiffcc.ADmath methods
 
     INPUTS
     =======
     function: A function defined using the autodiffcc.ADmath methods
-    start_values: Starting point for root-finding method as a scalar or vector; used only in newton-raphson
+    start_values: Starting point for root-finding method as a scalar or vector; used only in newton-raphson and
+                  broyden
     interval: Initial interval of values on which to attempt to find a root, either as an array or a list of
-              two dicts; used only in newton-fourier and bisection
-    method: Root-finding algorithm to use ['newton-raphson', 'newton-fourier', 'bisection']. The bisection method only
-            supports functions with a single output dimension.
+              two dicts; used only in newton-fourier, brent and bisection
+    method: Root-finding algorithm to use ['newton-raphson', 'newton-fourier', 'broyden', 'broyden-bad', 'brent',
+            'bisection']. 'broyden' is an alias of 'broyden-good'. The brent and bisection methods only
+            support functions with a single output dimension, and brent only functions of one variable.
+            Defaults to 'brent' if only an interval is given, and to 'newton-raphson' otherwise.
     threshold: Minimum threshold to declare convergence for the newton-raphson and newton-fourier methods
     max_iter: Maximum number of iterations taken for the algorithm to converge
+    linear_solver: How the newton-raphson and newton-fourier methods solve each step of a vector function, either
+                   'lu' for an LU factorization that falls back to least squares when the Jacobian is singular or
+                   not square, or 'pinv' for the pseudo-inverse
+    reuse_jacobian: Number of iterations each Jacobian and its factorization are reused for in the newton-raphson
+                    and newton-fourier methods; values above 1 trade extra iterations for fewer Jacobians
+    full_output: If True, also return the number of times function was evaluated, counting each evaluation
+                 with derivatives as one
 
     RETURNS
     ========
     An root of the function found or raised Exception if no root is found. If a function of multiple variables,
     this is is returned as an array where the values correspond with the variable positions supplied to find_root.
+    If full_output is True, a tuple (root, n_evaluations).
 
     EXAMPLES
     =========
@@ -405,14 +646,45 @@ def find_root(function, start_values=None, interval=None, method='newton-raphson
 
     >>> find_root(lambda x: x+2, 2, method='newton')
     array([-2.])
+
+    >>> find_root(lambda x: (x + 2) * (x - 3), interval=[0, 5], full_output=True)
+    (array([3.]), 9)
     """
     # process variable inputs
     signature = inspect.signature(function).parameters.keys()
 
+    if linear_solver not in ['lu', 'pinv']:
+        raise ValueError("Invalid linear_solver supplied, must be 'lu' or 'pinv'.")
+    if not isinstance(reuse_jacobian, int) or reuse_jacobian < 1:
+        raise ValueError("reuse_jacobian must be a positive integer.")
+
+    if method is None:
+        method = 'brent' if interval is not None and start_values is None else 'newton-raphson'
+
+    if full_output:
+        function = _count_calls(function)
+        return _find_root(function, start_values, interval, method, threshold, max_iter, linear_solver,
+                          reuse_jacobian, signature), function.n_calls
+    return _find_root(function, start_values, interval, method, threshold, max_iter, linear_solver, reuse_jacobian,
+                      signature)
+
+
+def _find_root(function, start_values, interval, method, threshold, max_iter, linear_solver, reuse_jacobian,
+               signature):
+    """Returns the root of function found with method, see find_root for the inputs"""
     # find roots
     if method.lower() in ['newton', 'newton-raphson', 'n-r']:
         values = _check_start_values(start_values=start_values, signature=signature)
-        return _newton_raphson(function, values, threshold, max_iter)
+        return _newton_raphson(function, values, threshold, max_iter, linear_solver, reuse_jacobian)
+
+    elif method.lower() in ['broyden', 'broyden-good', 'broyden-bad']:
+        values = _check_start_values(start_values=start_values, signature=signature)
+        variant = 'bad' if method.lower() == 'broyden-bad' else 'good'
+        return _broyden(function, values, threshold, max_iter, variant)
+
+    elif method.lower() in ['brent', 'brentq']:
+        interval_start, interval_end = _check_interval(interval=interval, signature=signature)
+        return _brent(function, interval_start, interval_end, threshold, max_iter)
 
     elif method.lower() in ['bisect', 'bisection', 'b']:
         interval_start, interval_end = _check_interval(interval=interval, signature=signature)
@@ -420,7 +692,70 @@ def find_root(function, start_values=None, interval=None, method='newton-raphson
 
     elif method.lower() in ['newton-fourier', 'n-f']:
         interval_start, interval_end = _check_interval(interval=interval, signature=signature)
-        return _newton_fourier(function, interval_start, interval_end, threshold, max_iter)
+        return _newton_fourier(function, interval_start, interval_end, threshold, max_iter, linear_solver,
+                               reuse_jacobian)
 
     else:
         raise ValueError("Invalid method supplied. See documentation for accepted methods.")
+
+
+def find_root_batch(function, start_values, args=(), threshold=1e-8, max_iter=2000):
+    """Returns the roots of many independent scalar equations found at once with the
+    Newton-Raphson method
+
+    INPUTS
+    =======
+    function: A function of one variable, followed by any parameters, defined using the autodiffcc.ADmath methods
+    start_values: Array of starting points, one per problem
+    args: Tuple of parameters passed to function after the variable, as scalars or arrays that broadcast
+          with start_values
+    threshold: Minimum threshold to declare convergence on a root
+    max_iter: Maximum number of iterations taken for the algorithm to converge
+
+    RETURNS
+    ========
+    roots: array of the last iterate of each problem, with the broadcast shape of start_values and args
+    iterations: integer array of the number of Newton steps taken by each problem
+    converged: boolean array, True where the absolute value of function at the root is below threshold
+
+    NOTES
+    =====
+    Every problem is one entry of a vector AD object, so each iteration evaluates the
+    value and derivative of all unconverged problems with a single call of function.
+    Converged problems are masked out of later iterations, and problems that hit a
+    zero or non-finite derivative stop without converging instead of raising.
+
+    EXAMPLES
+    =========
+    >>> roots, iterations, converged = find_root_batch(lambda x, a: x ** 2 - a, [1, 1, 1], args=([1, 4, 9],))
+    >>> roots
+    array([1., 2., 3.])
+    """
+    values = np.broadcast_arrays(np.asarray(start_values, dtype=float), *[np.asarray(arg) for arg in args])
+    shape = values[0].shape
+    roots = values[0].flatten()
+    params = [value.flatten() for value in values[1:]]
+
+    iterations = np.zeros(roots.shape, dtype=int)
+    converged = np.zeros(roots.shape, dtype=bool)
+    active = np.arange(roots.size)
+
+    for i in range(max_iter + 1):
+        result = function(AD(roots[active], n_vars=1, idx=0), *[param[active] for param in params])
+        val = np.broadcast_to(getattr(result, 'val', result), active.shape)
+        der = np.broadcast_to(result.der[0] if isinstance(result, AD) else 0.0, active.shape)
+
+        done = np.abs(val) < threshold
+        converged[active[done]] = True
+        # problems without a usable Newton step stop here without converging
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = val / der
+        keep = ~done & np.isfinite(step)
+        if i == max_iter or not keep.any():
+            break
+
+        active, step = active[keep], step[keep]
+        roots[active] -= step
+        iterations[active] += 1
+
+    return roots.reshape(shape), iterations.reshape(shape), converged.reshape(shape)
@@ -0,0 +1,270 @@
+import numpy as np
+
+
+def _broadcast_shape(shape, other_shape):
+    """Returns the shape two arrays broadcast to, skipping numpy in the common equal or scalar cases"""
+    if shape == other_shape or not other_shape:
+        return shape
+    if not shape:
+        return other_shape
+    # np.broadcast of zero-strided views, since np.broadcast_shapes needs numpy 1.20
+    return np.broadcast(np.broadcast_to(False, shape), np.broadcast_to(False, other_shape)).shape
+
+
+class SparseDer():
+    """Stores the derivative of an AD object as its nonzero partial derivatives only.
+
+    A dense derivative holds one entry per variable even when the value depends on
+    only a few of them. SparseDer keeps a dict from variable index to partial
+    derivative, so the cost of each operation grows with the number of variables
+    the value actually depends on rather than with n_vars.
+
+    ATTRIBUTES
+    ==========
+    partials : dict mapping variable index to the partial derivative with respect to it
+    n_vars : the total number of variables
+    val_shape : the shape of the value the derivative belongs to
+
+    METHODS
+    =======
+    Overloads the arithmetic used by the AD operators and ADmath functions: sums and
+    differences of derivatives, and products and quotients with values.
+
+    EXAMPLES
+    ========
+    >>> der = SparseDer({2: np.array(1.0)}, 5)
+    >>> (3 * der + der).toarray()
+    array([0., 0., 4., 0., 0.])
+    """
+
+    # makes numpy defer to our reflected operators instead of iterating over the derivative
+    __array_ufunc__ = None
+
+    def __init__(self, partials, n_vars, val_shape=()):
+        self.partials = partials
+        self.n_vars = n_vars
+        self.val_shape = tuple(val_shape)
+
+    @property
+    def shape(self):
+        return (self.n_vars,) + self.val_shape
+
+    def toarray(self):
+        """Returns the derivative as a dense numpy array of shape (n_vars,) + val_shape
+
+        EXAMPLES
+        =========
+        >>> SparseDer({0: np.array([1.0, 2.0])}, 2, (2,)).toarray()
+        array([[1., 2.],
+               [0., 0.]])
+        """
+        dense = np.zeros(self.shape)
+        for idx, partial in self.partials.items():
+            dense[idx] = partial
+        return dense
+
+    def flatten(self):
+        """Returns the dense derivative flattened to 1-D"""
+        return self.toarray().flatten()
+
+    def _scale(self, func, factor):
+        """Returns a SparseDer with func applied to every partial, where func
+        multiplies or divides the partial by factor"""
+        partials = {idx: func(partial) for idx, partial in self.partials.items()}
+        return SparseDer(partials, self.n_vars, _broadcast_shape(self.val_shape, np.shape(factor)))
+
+    def __neg__(self):
+        """Returns the negated derivative"""
+        return SparseDer({idx: -partial for idx, partial in self.partials.items()}, self.n_vars, self.val_shape)
+
+    def __add__(self, other):
+        """Returns the sum of two derivatives, merging their nonzero partials
+
+        INPUTS
+        =======
+        self: SparseDer object
+        other: SparseDer object or dense numpy array
+
+        RETURNS
+        ========
+        self + other
+        """
+        if not isinstance(other, SparseDer):
+            return self.toarray() + other
+        if len(other.partials) > len(self.partials):
+            return other.__add__(self)
+        partials = dict(self.partials)
+        for idx, partial in other.partials.items():
+            if idx in partials:
+                partials[idx] = partials[idx] + partial
+            else:
+                partials[idx] = partial
+        return SparseDer(partials, self.n_vars, _broadcast_shape(self.val_shape, other.val_shape))
+
+    def __radd__(self, other):
+        """Returns the reflected sum of two derivatives"""
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """Returns the difference of two derivatives"""
+        return self.__add__(-other)
+
+    def __rsub__(self, other):
+        """Returns the reflected difference of two derivatives"""
+        return (-self).__add__(other)
+
+    def __mul__(self, other):
+        """Returns the derivative scaled by a scalar or array factor
+
+        EXAMPLES
+        =========
+        >>> (SparseDer({1: np.array(2.0)}, 3) * 4).partials
+        {1: 8.0}
+        """
+        return self._scale(lambda partial: partial * other, other)
+
+    def __rmul__(self, other):
+        """Returns the derivative scaled by a scalar or array factor"""
+        return self._scale(lambda partial: other * partial, other)
+
+    def __truediv__(self, other):
+        """Returns the derivative divided by a scalar or array factor"""
+        return self._scale(lambda partial: partial / other, other)
+
+    def __repr__(self):
+        return f"SparseDer({self.partials}, n_vars={self.n_vars})"
+
+
+def _outputs(result):
+    """Returns the outputs of a differentiated function as a list"""
+    if np.isscalar(result) or hasattr(result, 'der'):
+        return [result]
+    return list(result)
+
+
+def _sparse_jacobian(result, n_vars, shape):
+    """Returns the Jacobian of a function evaluated on sparse AD variables as a
+    scipy.sparse csr_matrix laid out like the dense Jacobian of differentiate
+
+    INPUTS
+    =======
+    result: the output of base_func evaluated on AD objects with SparseDer derivatives
+    n_vars: number of variables of base_func
+    shape: the shape of each input value
+
+    RETURNS
+    ========
+    scipy.sparse csr_matrix with one row per output and one column per input entry
+    """
+    from scipy import sparse
+
+    size = int(np.prod(shape))
+    outputs = _outputs(result)
+
+    rows, cols, data = [], [], []
+    offsets = np.arange(size)
+    for i, output in enumerate(outputs):
+        if not isinstance(getattr(output, 'der', None), SparseDer):
+            continue
+        for idx, partial in output.der.partials.items():
+            if size == 1:
+                rows.append(i)
+                cols.append(idx)
+                data.append(float(partial))
+            else:
+                rows.extend([i] * size)
+                cols.extend(idx * size + offsets)
+                data.extend(np.broadcast_to(partial, shape).ravel())
+
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(outputs), n_vars * size))
+
+
+def _sparsity_pattern(result):
+    """Returns the row and column indices of the structurally nonzero Jacobian
+    entries of a function evaluated on sparse AD variables
+
+    INPUTS
+    =======
+    result: the output of base_func evaluated on AD objects with SparseDer derivatives
+
+    RETURNS
+    ========
+    rows, cols: integer numpy arrays, output i depends on variable j for each pair (i, j)
+    """
+    rows, cols = [], []
+    for i, output in enumerate(_outputs(result)):
+        if isinstance(getattr(output, 'der', None), SparseDer):
+            for idx in output.der.partials:
+                rows.append(i)
+                cols.append(idx)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+def _colour_columns(rows, cols, n_vars):
+    """Greedily colours the Jacobian columns so that no two columns of one colour
+    share a nonzero row
+
+    INPUTS
+    =======
+    rows, cols: the sparsity pattern of the Jacobian
+    n_vars: number of columns of the Jacobian
+
+    RETURNS
+    ========
+    integer numpy array with the colour of each column
+
+    NOTES
+    =====
+    Columns of the same colour can be seeded with one combined direction, since each
+    output depends on at most one of them.
+
+    EXAMPLES
+    =========
+    >>> rows = np.array([0, 0, 1, 1, 1, 2, 2])
+    >>> cols = np.array([0, 1, 0, 1, 2, 1, 2])
+    >>> _colour_columns(rows, cols, 3)
+    array([0, 1, 2])
+    """
+    col_rows = [[] for _ in range(n_vars)]
+    for row, col in zip(rows, cols):
+        col_rows[col].append(row)
+
+    row_colours = {}
+    colours = np.zeros(n_vars, dtype=int)
+    for col in range(n_vars):
+        # colours already used by another column sharing a row with this one
+        used = set()
+        for row in col_rows[col]:
+            used.update(row_colours.get(row, ()))
+        colour = 0
+        while colour in used:
+            colour += 1
+        colours[col] = colour
+        for row in col_rows[col]:
+            row_colours.setdefault(row, set()).add(colour)
+    return colours
+
+
+def _decompress(result, rows, cols, colours, n_vars):
+    """Returns the Jacobian recovered from a function evaluated on colour-compressed
+    seed directions as a scipy.sparse csr_matrix
+
+    INPUTS
+    =======
+    result: the output of base_func evaluated on AD objects seeded with one direction per colour
+    rows, cols: the sparsity pattern of the Jacobian
+    colours: the colour of each column
+    n_vars: number of columns of the Jacobian
+
+    RETURNS
+    ========
+    scipy.sparse csr_matrix of shape (n_outputs, n_vars)
+    """
+    from scipy import sparse
+
+    outputs = _outputs(result)
+    n_colours = colours.max() + 1
+    compressed = np.array([output.der if hasattr(output, 'der') else np.zeros(n_colours) for output in outputs])
+    # entry (i, j) is the derivative of output i in the direction of column j's colour
+    data = compressed[rows, colours[cols]]
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(outputs), n_vars))
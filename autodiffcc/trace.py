@@ -0,0 +1,297 @@
+import inspect
+import operator
+import numpy as np
+from autodiffcc.core import AD, _get_inputs, _jacobian_function
+
+
+class _Program():
+    """A flat list of numpy operations recorded while tracing a function
+
+    ATTRIBUTES
+    ==========
+    ops : list of (function, args) pairs, each writing into a preallocated buffer
+    """
+
+    def __init__(self):
+        self.ops = []
+
+    def record(self, func, args, kwargs, value):
+        """Records func(*args, **kwargs), whose value at the example inputs is value,
+        and returns a _Traced placeholder for its result"""
+        buffer = np.empty(np.shape(value), dtype=np.result_type(value))
+        if isinstance(func, np.ufunc) and not kwargs:
+            # ufuncs treat numpy scalars and 0-d arrays alike, so they write straight into buffer
+            self.ops.append((func, _buffer_of(args) + (buffer,)))
+        else:
+            self.ops.append((_assignment(buffer, func, args, kwargs), ()))
+        return _Traced(self, value, buffer)
+
+    def run(self):
+        """Replays every recorded operation in order"""
+        for func, args in self.ops:
+            func(*args)
+
+
+def _assignment(buffer, func, args, kwargs):
+    """Returns a function that writes func(*args, **kwargs) into buffer
+
+    Traced arguments that were numpy scalars rather than arrays are passed as scalars
+    again, since operators such as ** take different code paths for the two.
+    """
+    scalar = tuple(isinstance(arg, _Traced) and not isinstance(arg.value, np.ndarray) for arg in args)
+    args = _buffer_of(args)
+    if not any(scalar):
+        def assign():
+            np.copyto(buffer, func(*args, **kwargs))
+    else:
+        def assign():
+            np.copyto(buffer, func(*[arg[()] if is_scalar else arg for arg, is_scalar in zip(args, scalar)],
+                                   **kwargs))
+    return assign
+
+
+def _buffer_of(arg):
+    """Replaces traced values inside an argument by their buffers"""
+    if isinstance(arg, _Traced):
+        return arg.buffer
+    if isinstance(arg, (list, tuple)):
+        return type(arg)(_buffer_of(item) for item in arg)
+    return arg
+
+
+def _value_of(arg):
+    """Replaces traced values inside an argument by their example values"""
+    if isinstance(arg, _Traced):
+        return arg.value
+    if isinstance(arg, (list, tuple)):
+        return type(arg)(_value_of(item) for item in arg)
+    return arg
+
+
+class _Traced():
+    """Stands in for a numpy array inside an AD object while a function is traced.
+
+    Every numpy operation applied to a _Traced value is evaluated on the example
+    value and recorded on the program. Comparisons and truth tests are evaluated
+    on the example value only, so branches are fixed at trace time.
+
+    ATTRIBUTES
+    ==========
+    program : the _Program the value belongs to
+    value : the value computed from the example inputs
+    buffer : the array the value is written to when the program is replayed
+    """
+
+    def __init__(self, program, value, buffer):
+        self.program = program
+        self.value = value
+        self.buffer = buffer
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if 'out' in kwargs:
+            return NotImplemented
+        if ufunc is np.power and method == '__call__' and not kwargs:
+            # ndarray ** scalar has fast paths that np.power does not, so replay the operator
+            return self.program.record(operator.pow, inputs, {}, operator.pow(*_value_of(inputs)))
+        func = ufunc if method == '__call__' else getattr(ufunc, method)
+        value = func(*_value_of(inputs), **kwargs)
+        if np.asarray(value).dtype == bool:
+            return value
+        return self.program.record(func, inputs, kwargs, value)
+
+    def __array_function__(self, func, types, args, kwargs):
+        value = func(*_value_of(args), **kwargs)
+        if not isinstance(value, (np.ndarray, np.generic)) or np.asarray(value).dtype == bool:
+            return value
+        return self.program.record(func, args, kwargs, value)
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    @property
+    def ndim(self):
+        return self.value.ndim
+
+    def __len__(self):
+        return len(self.value)
+
+    def all(self, *args, **kwargs):
+        return self.value.all(*args, **kwargs)
+
+    def any(self, *args, **kwargs):
+        return self.value.any(*args, **kwargs)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def flatten(self):
+        return self.program.record(np.ravel, (self,), {}, self.value.flatten())
+
+    def reshape(self, *shape):
+        return self.program.record(np.reshape, (self, shape), {}, self.value.reshape(*shape))
+
+    def __getitem__(self, key):
+        return self.program.record(operator.getitem, (self, key), {}, self.value[key])
+
+    def __pos__(self):
+        return np.positive(self)
+
+    def __neg__(self):
+        return np.negative(self)
+
+    def __abs__(self):
+        return np.absolute(self)
+
+    def __add__(self, other):
+        return np.add(self, other)
+
+    def __radd__(self, other):
+        return np.add(other, self)
+
+    def __sub__(self, other):
+        return np.subtract(self, other)
+
+    def __rsub__(self, other):
+        return np.subtract(other, self)
+
+    def __mul__(self, other):
+        return np.multiply(self, other)
+
+    def __rmul__(self, other):
+        return np.multiply(other, self)
+
+    def __truediv__(self, other):
+        return np.true_divide(self, other)
+
+    def __rtruediv__(self, other):
+        return np.true_divide(other, self)
+
+    def __pow__(self, other):
+        return self.program.record(operator.pow, (self, other), {}, self.value ** _value_of(other))
+
+    def __rpow__(self, other):
+        return self.program.record(operator.pow, (other, self), {}, _value_of(other) ** self.value)
+
+    def __eq__(self, other):
+        return np.equal(self, other)
+
+    def __ne__(self, other):
+        return np.not_equal(self, other)
+
+    def __lt__(self, other):
+        return np.less(self, other)
+
+    def __le__(self, other):
+        return np.less_equal(self, other)
+
+    def __gt__(self, other):
+        return np.greater(self, other)
+
+    def __ge__(self, other):
+        return np.greater_equal(self, other)
+
+    def __repr__(self):
+        return f"_Traced({self.value})"
+
+
+def _source(der):
+    """Returns the array holding a derivative after replay: its buffer if traced, else the constant"""
+    if isinstance(der, _Traced):
+        return der.buffer
+    return np.array(der)
+
+
+def compile_jacobian(base_func, example_inputs):
+    """Traces base_func once and returns a function that computes the same Jacobian as
+    differentiate(base_func) by replaying the recorded numpy operations
+
+    INPUTS
+    =======
+    base_func: a function that uses autodiffcc math functions to create an output
+    example_inputs: list of values, or dict of values keyed by variable name, at which
+        base_func is traced
+
+    RETURNS
+    ========
+    a function that takes values of the same shapes as example_inputs and returns the
+        Jacobian of base_func exactly as the AD operators compute it, which is what
+        differentiate(base_func) returns for array inputs
+
+    NOTES
+    =====
+    Tracing runs base_func once through the AD operators and records every numpy
+    operation on the value and derivative arrays into a flat list. Later calls copy
+    the inputs into preallocated buffers and replay that list, without creating AD
+    objects or inspecting the signature of base_func again. This pays off for array
+    inputs; when every input is a scalar the function returned is the dual number
+    path of differentiate, which is already faster than a replay.
+
+    PRE:
+         - the control flow of base_func does not depend on the values of its inputs;
+           comparisons and domain checks are evaluated at example_inputs only
+
+    EXAMPLES
+    =========
+    >>> from autodiffcc.ADmath import sin
+    >>> def f(x, y):
+    ...     return x * sin(y), x + y
+    >>> jacobian = compile_jacobian(f, [np.array([1.0, 2.0]), 2.0])
+    >>> jacobian(np.array([3.0, 4.0]), 0.0)
+    array([[0., 0., 3., 4.],
+           [1., 1., 1., 1.]])
+    """
+    variables = _get_inputs(base_func, example_inputs)
+    names = list(inspect.signature(base_func).parameters)
+    n_vars = len(variables)
+
+    def inputs_of(posvars, kwvars, shapes):
+        """Returns the inputs of a call in signature order, checked against the example shapes"""
+        if kwvars:
+            try:
+                posvars = [kwvars[name] for name in names]
+            except KeyError as error:
+                raise KeyError(f"key {error} in base_func signature missing from kwvars")
+        if len(posvars) != n_vars:
+            raise KeyError("Incorrect number of variables passed in arguments.")
+        if any(np.shape(value) != shape for value, shape in zip(posvars, shapes)):
+            raise ValueError("Inputs must have the same shapes as example_inputs.")
+        return posvars
+
+    if all(np.ndim(value) == 0 for value in variables):
+        # differentiate already takes its dual number path for scalar inputs, which
+        # replaying numpy operations on 0-d arrays does not beat
+        evaluate = _jacobian_function(base_func, False, False, False)
+        return lambda *posvars, **kwvars: evaluate(*inputs_of(posvars, kwvars, [()] * n_vars))[1]
+
+    program = _Program()
+    inputs = []
+    for i in range(n_vars):
+        # validate the example input as differentiate would, then trace its value
+        seed = AD(variables[i], n_vars=n_vars, idx=i)
+        traced = _Traced(program, seed.val, np.empty(seed.val.shape))
+        inputs.append(traced.buffer)
+        variables[i] = AD._new(traced, seed.der)
+
+    # run base_func on the traced variables, recording every operation
+    result = base_func(*variables)
+
+    # record how differentiate assembles the Jacobian from the result
+    if np.isscalar(result):
+        constant = AD(result, der=0).der
+        assemble = lambda: constant.copy()
+    elif isinstance(result, AD):
+        source = _source(result.der)
+        assemble = lambda: source.flatten().reshape(1, -1)
+    else:
+        sources = [_source(output.der) if isinstance(output, AD) else np.zeros(n_vars) for output in result]
+        assemble = lambda: np.array([source.flatten() for source in sources])
+
+    def jacobian(*posvars, **kwvars):
+        posvars = inputs_of(posvars, kwvars, [buffer.shape for buffer in inputs])
+        for buffer, value in zip(inputs, posvars):
+            np.copyto(buffer, value)
+        program.run()
+        return assemble()
+
+    return jacobian
@@ -0,0 +1,72 @@
+"""Measures the time and memory retained per AD operation.
+
+Run from the repository root with
+
+    python -m benchmarks.ad_ops
+
+so that the autodiffcc package of the working tree is imported.
+
+Each operation is timed over many repetitions and the best of five runs is
+reported. Memory is measured with tracemalloc while keeping every result alive,
+so blocks and bytes are what one result object holds on to.
+"""
+import timeit
+import tracemalloc
+import numpy as np
+import autodiffcc as ad
+
+N_VARS = 3
+x = ad.AD(1.5, n_vars=N_VARS, idx=0)
+y = ad.AD(0.5, n_vars=N_VARS, idx=1)
+
+OPS = {
+    '-x': lambda: -x,
+    'x + y': lambda: x + y,
+    'x + 2': lambda: x + 2,
+    'x * y': lambda: x * y,
+    'x * 2': lambda: x * 2,
+    'x / y': lambda: x / y,
+    'x ** 2': lambda: x ** 2,
+    'x ** y': lambda: x ** y,
+    'sin(x)': lambda: ad.sin(x),
+    'exp(x)': lambda: ad.exp(x),
+    'log(x)': lambda: ad.log(x),
+}
+
+
+def f(x, y, z):
+    return 3 * x ** 2 + ad.sin(y) * z - x / y + ad.exp(z) * x - 4
+
+
+def time_per_op(op, number=20000):
+    """Returns the best time in microseconds for one call of op"""
+    return min(timeit.repeat(op, number=number, repeat=5)) / number * 1e6
+
+
+def memory_per_op(op, number=1000):
+    """Returns the memory blocks and bytes retained by one result of op"""
+    results = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(number):
+        results.append(op())
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / number, size / number
+
+
+def main():
+    print(f"{'operation':<24}{'time (us)':>12}{'blocks':>10}{'bytes':>10}")
+    for name, op in OPS.items():
+        blocks, size = memory_per_op(op)
+        print(f"{name:<24}{time_per_op(op):>12.2f}{blocks:>10.1f}{size:>10.0f}")
+
+    dfdx = ad.differentiate(f)
+    print(f"{'differentiate(f)':<24}{time_per_op(lambda: dfdx(1.5, 0.5, 2.0), 2000):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compares the cached-corner bisection with the previous corner-recomputing one.
+
+Run from the repository root with
+
+    python -m benchmarks.bisection
+
+so that the autodiffcc package of the working tree is imported.
+
+Both versions solve sum(x_k ** 3) = 0.37 * n on the box [-1, 1.5]^n for n = 1 to 6
+variables. The previous version evaluated all 2^n corners of a new box, spanned by
+the centre and a corner, on every iteration; it is reproduced here without its
+plotting and printing. The table reports the evaluations of the function and the
+best time of five runs for each.
+"""
+import itertools
+import timeit
+import numpy as np
+from autodiffcc.root import _bisect, _norm
+
+THRESHOLD = 1e-8
+MAX_ITER = 2000
+
+
+def reference_bisect(function, interval_start, interval_end, max_iter, threshold):
+    """Returns a root found with the previous bisection, which recomputes every corner"""
+    n_params = len(interval_start)
+    points = np.asarray(np.c_[interval_start, interval_end])
+    allpoints = list(itertools.product(*points))
+    results = [function(*elements) for elements in allpoints]
+    asign = np.sign(results)
+    signchange = sum(((np.roll(asign, 1) - asign) != 0).astype(int)) > 0
+    if not signchange:
+        raise Exception("No change in sign")
+
+    i = 1
+    while signchange:
+        i = i + 1
+        if i >= max_iter:
+            raise Exception("Bisection did not converge")
+        c = [(points[k][0] + points[k][1]) / 2 for k in range(n_params)]
+        middle = function(*c)
+        if _norm(middle) < threshold:
+            return c
+        for j, n in enumerate(results):
+            if n * middle < 0:
+                corner = list(allpoints[j])
+        points = np.asarray(np.c_[min(corner, c), max(corner, c)])
+        allpoints = list(itertools.product(*points))
+        results = [function(*elements) for elements in allpoints]
+        asign = np.sign(results)
+        signchange = sum(((np.roll(asign, 1) - asign) != 0).astype(int)) > 0
+
+
+def problem(n):
+    """Returns a function of n variables with a root inside [-1, 1.5]^n, and a list that counts its calls"""
+    calls = []
+
+    def f(*x):
+        calls.append(1)
+        return sum(xk ** 3 for xk in x) - 0.37 * n
+
+    return f, calls
+
+
+def main():
+    print(f"{'variables':<12}{'previous evals':>16}{'cached evals':>14}{'previous (ms)':>15}{'cached (ms)':>13}")
+    for n in range(1, 7):
+        start, end = np.full(n, -1.0), np.full(n, 1.5)
+
+        f, calls = problem(n)
+        reference_bisect(f, start, end, MAX_ITER, THRESHOLD)
+        previous_evals = len(calls)
+        calls.clear()
+        _bisect(f, start, end, MAX_ITER, THRESHOLD, range(n))
+        cached_evals = len(calls)
+
+        previous = min(timeit.repeat(lambda: reference_bisect(f, start, end, MAX_ITER, THRESHOLD),
+                                     number=1, repeat=5)) * 1e3
+        cached = min(timeit.repeat(lambda: _bisect(f, start, end, MAX_ITER, THRESHOLD, range(n)),
+                                   number=1, repeat=5)) * 1e3
+        print(f"{n:<12}{previous_evals:>16}{cached_evals:>14}{previous:>15.2f}{cached:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
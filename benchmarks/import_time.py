@@ -0,0 +1,47 @@
+"""Measures the time taken by a fresh interpreter to import autodiffcc.
+
+Run from the repository root with
+
+    python -m benchmarks.import_time
+
+so that the autodiffcc package of the working tree is imported.
+
+Every import runs in a new interpreter, since a module is only imported once per
+process. numpy is required by autodiffcc, so it is timed on its own as well, and
+the difference is what autodiffcc adds. The best of ten runs is reported.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 10
+
+# imports numpy first, so that the second time is what autodiffcc adds on top of it
+TIMER = """import time
+start = time.perf_counter()
+import numpy
+middle = time.perf_counter()
+import {0}
+end = time.perf_counter()
+print(middle - start, end - middle)
+"""
+
+
+def import_times(module):
+    """Returns the seconds taken to import numpy and then module in a new interpreter"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.run([sys.executable, '-c', TIMER.format(module)], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+    return [float(seconds) for seconds in output.split()]
+
+
+def main():
+    print(f"{'module':<24}{'numpy (ms)':>12}{'on top of numpy (ms)':>22}")
+    for module in ('autodiffcc', 'autodiffcc.parser', 'autodiffcc.Equation'):
+        numpy_time, module_time = (min(times) * 1e3 for times in zip(*[import_times(module) for _ in range(REPEAT)]))
+        print(f"{module:<24}{numpy_time:>12.1f}{module_time:>22.1f}")
+
+
+if __name__ == '__main__':
+    main()
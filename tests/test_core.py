@@ -1,11 +1,15 @@
 import pytest
 from autodiffcc.ADmath import *
-from autodiffcc.core import AD, differentiate
+from autodiffcc.core import AD, differentiate, jvp, value_and_jacobian
 
 
 def test_matrix_value():
-    with pytest.raises(ValueError):
-        t1 = AD(val=np.array([[1, 2], [2, 4]]), n_vars=1, idx=0)
+    t1 = AD(val=np.array([[1, 2], [2, 4]]), n_vars=2, idx=1)
+    assert t1.val.shape == (2, 2)
+    assert np.array_equal(t1.der, [np.zeros((2, 2)), np.ones((2, 2))])
+    t2 = sin(t1) * t1 + 1
+    assert np.allclose(t2.val, np.sin(t1.val) * t1.val + 1)
+    assert np.allclose(t2.der[1], np.cos(t1.val) * t1.val + np.sin(t1.val))
 
 
 def test_nvars_and_der():
@@ -315,3 +319,216 @@ def test_differentiate_vector_function_0_der():
         return 2, 3
     assert np.allclose(differentiate(f)(3,1), 0)
 
+
+def test_differentiate_batch():
+    def f(x, y):
+        f1 = sin(x * y) + exp(x) / sqrt(y) + arcsin(x / 4) * arccos(y / 4) + log(y, 2)
+        f2 = tanh(x) * logistic(y) + arctan(x - y) + cosh(x) - sinh(y) + tan(x) * cos(y) + 2 ** x - x / y
+        return f1, f2, 3
+
+    x = np.linspace(0.1, 2, 50)
+    y = np.linspace(0.5, 3, 50)
+    jacobians = differentiate(f, batch=True)(x, y)
+    assert jacobians.shape == (50, 3, 2)
+    dfdx = differentiate(f)
+    for i in range(50):
+        assert np.allclose(jacobians[i], dfdx(x[i], y[i]))
+    assert np.allclose(differentiate(f, batch=True)(x=x, y=y), jacobians)
+
+
+def test_differentiate_batch_scalar_function():
+    def f(x, y):
+        return x ** 2 * y
+
+    jacobians = differentiate(f, batch=True)(np.array([1, 2, 3]), 2)
+    assert jacobians.shape == (3, 1, 2)
+    assert np.allclose(jacobians[:, 0, 0], [4, 8, 12])
+    assert np.allclose(jacobians[:, 0, 1], [1, 4, 9])
+
+    with pytest.raises(ValueError):
+        differentiate(f, batch=True)(np.ones((2, 2)), 1)
+
+
+def test_jvp():
+    def f(x, y, z):
+        return x * sin(y) + z ** 2, exp(x * z), 4, y / x
+
+    x = [1.5, 0.3, -0.8]
+    v = [0.2, -1.0, 3.0]
+    assert np.allclose(jvp(f, x, v), differentiate(f)(*x) @ v)
+    assert np.allclose(jvp(f, {'z': -0.8, 'y': 0.3, 'x': 1.5}, v), differentiate(f)(*x) @ v)
+    assert np.allclose(jvp(lambda x, y: x * y, [2, 3], [1, 0]), [3])
+    with pytest.raises(ValueError):
+        jvp(f, x, [1, 2])
+
+
+def test_jvp_vector_inputs():
+    def f(x, y):
+        return x * y + sin(x)
+
+    x = np.array([1., 2., 3.])
+    y = np.array([2., 1., 4.])
+    tangent = jvp(f, [x, y], [np.ones(3), 2])
+    assert tangent.shape == (1, 3)
+    assert np.allclose(tangent[0], y + np.cos(x) + 2 * x)
+    # reductions and matrix products see the usual derivative layout
+    assert np.allclose(jvp(lambda x: np.sum(x * x), [x], [np.ones(3)]), [2 * np.sum(x)])
+    assert np.allclose(jvp(lambda x: np.mean(x), [x], [np.array([3., 0., 0.])]), [1])
+    A = np.array([[1., 2., 0.], [0., 1., 3.]])
+    assert np.allclose(jvp(lambda x: A @ x, [x], [y]), [A @ y])
+    assert np.allclose(jvp(lambda x, y: x @ y, [x, y], [np.ones(3), np.zeros(3)]), [np.sum(y)])
+    # constant outputs have zero tangents of the same shape as the others
+    tangent = jvp(lambda x, y: (x * y, 4), [x, y], [np.ones(3), np.zeros(3)])
+    assert tangent.shape == (2, 3)
+    assert np.allclose(tangent, [y, np.zeros(3)])
+
+
+def test_constant_operands():
+    x = AD(2, n_vars=2, idx=0)
+    for f, der in [(x + 3, 1), (3 + x, 1), (x - 3, 1), (3 - x, -1), (x * 3, 3), (3 * x, 3),
+                   (x / 4, 0.25), (4 / x, -1), (x ** 3, 12), (3 ** x, 9 * np.log(3))]:
+        assert np.allclose(f.der, [der, 0])
+    # the derivative with respect to the exponent vanishes elementwise where the base is 0
+    y = AD(np.array([2., 3.]), n_vars=1, idx=0)
+    f = np.array([0., 2.]) ** y
+    assert np.allclose(f.val, [0, 8])
+    assert np.allclose(f.der, [[0, 8 * np.log(2)]])
+
+
+def test_internal_constructor():
+    val = np.array([1., 2.])
+    der = np.ones((1, 2))
+    x = AD._new(val, der)
+    assert x.val is val
+    assert x.der is der
+    assert not hasattr(x, '__dict__')
+    # operator results are built without copying or validation but keep the same values
+    f = 2 * AD(val, n_vars=1, idx=0) + 1
+    assert isinstance(f, AD)
+    assert np.array_equal(f.val, [3, 5])
+    assert np.array_equal(f.der, [[2, 2]])
+
+
+def test_numpy_ufuncs():
+    def f_numpy(x, y):
+        return (np.sin(x) * np.exp(y) + np.sqrt(x) / y - np.log(x) ** 2 + np.tanh(y) - np.arctan(x)
+                + np.power(x, y) + np.square(y) + np.log10(x) + np.abs(-x) + np.reciprocal(y) - np.cos(y))
+
+    def f_admath(x, y):
+        return (sin(x) * exp(y) + sqrt(x) / y - log(x) ** 2 + tanh(y) - arctan(x)
+                + x ** y + y * y + log(x, 10) + x + 1 / y - cos(y))
+
+    assert np.allclose(differentiate(f_numpy)(0.7, 1.3), differentiate(f_admath)(0.7, 1.3))
+    x = np.array([0.7, 1.1, 2.0])
+    y = np.array([1.3, 0.4, 0.9])
+    assert np.allclose(differentiate(f_numpy)(x, y), differentiate(f_admath)(x, y))
+
+    x = AD(3, n_vars=1, idx=0)
+    assert np.allclose((np.array(2.) * x).der, [2])
+    assert np.allclose(np.subtract(1, x).der, [-1])
+    assert np.greater(x, 2) and np.less_equal(2, x)
+    with pytest.raises(TypeError):
+        np.add(x, 1, out=np.empty(1))
+
+
+def test_numpy_functions():
+    A = np.array([[1., 2., 3.], [0., -1., 4.]])
+
+    def f(x):
+        return np.sum(A @ x), np.mean(x), np.dot(x, x), np.dot(np.array([1., 0., 2.]), x), np.sum(np.dot(A, x) * 2)
+
+    # a vector input is one variable, so each row is the derivative along all its entries at once
+    x = np.array([1., 2., 3.])
+    jacobian = differentiate(f)(x)
+    assert jacobian.shape == (5, 1)
+    assert np.allclose(jacobian, [[A.sum()], [1], [2 * x.sum()], [3], [2 * A.sum()]])
+
+    ad_x = AD(x, n_vars=1, idx=0)
+    assert np.allclose(np.sum(ad_x).val, 6)
+    assert np.allclose(np.sum(ad_x, axis=0, keepdims=True).der, [[3]])
+    assert np.allclose((A @ ad_x).der, [A.sum(axis=1)])
+    # scalar inputs are dual numbers, which numpy functions accept too
+    assert np.allclose(differentiate(lambda x, y: np.sum(x) * np.dot(x, y))(2, 3), [[12, 4]])
+
+
+def test_broadcasting():
+    A = np.array([[1., 2.], [3., 4.]])
+    s = AD(2., n_vars=2, idx=0)
+    # the derivative of a scalar times an array constant has the shape of the array
+    assert np.array_equal((s * A).der, [A, np.zeros((2, 2))])
+    assert np.array_equal(np.sum(s * A).der, [10, 0])
+    assert (A + s).der.shape == (s - A).der.shape == (A / s).der.shape == (s ** A).der.shape == (2, 2, 2)
+
+    v = AD(np.array([1., 2., 3.]), n_vars=2, idx=1)
+    assert np.array_equal((s + v).der, [[1, 1, 1], [1, 1, 1]])
+    assert np.array_equal((s * v).der, [[1, 2, 3], [2, 2, 2]])
+    assert np.allclose((s / v).der, [1 / v.val, -2 / v.val ** 2])
+    assert np.allclose(np.sum(v ** s).der, [np.sum(np.log(v.val) * v.val ** 2), np.sum(2 * v.val)])
+
+
+def test_broadcasting_reflected():
+    C = np.array([[1.], [2.], [3.]])
+
+    def operations(x, y):
+        return x + C, C + x, x - C, C - x, x * C, C * x, x / C, C / x, x ** C, C ** x, x + y, y - x, y * x, x / y, y ** x
+
+    # broadcasting the inputs first must not change any derivative
+    x = AD(np.array([0.5, 1.5]), n_vars=2, idx=0)
+    y = AD(np.array(2.), n_vars=2, idx=1)
+    X = AD(np.broadcast_to(x.val, (3, 2)), der=np.broadcast_to(x.der[:, None], (2, 3, 2)))
+    Y = AD(np.full((3, 2), 2.), der=np.broadcast_to(y.der[:, None, None], (2, 3, 2)))
+    for f, g in zip(operations(x, y), operations(X, Y)):
+        assert f.der.shape == (2,) + f.val.shape
+        assert np.allclose(f.der if f.val.ndim == 2 else f.der[:, None], g.der)
+
+
+def test_linear_algebra():
+    A = np.array([[2., 1., 0.], [0.5, 3., 1.], [1., 0., 4.]])
+    b = np.array([1., 2., 3.])
+    # seed one direction per entry of A to get derivatives with respect to each entry
+    X = AD(A, der=np.eye(9).reshape(9, 3, 3))
+    inverse = np.linalg.inv(A)
+    assert np.allclose(np.linalg.det(X).der.reshape(3, 3), np.linalg.det(A) * inverse.T)
+    assert np.allclose(np.linalg.inv(X).der.reshape(3, 3, 3, 3), -np.einsum('ik,lj->klij', inverse, inverse))
+    x = np.linalg.solve(A, b)
+    assert np.allclose(np.linalg.solve(X, b).der.reshape(3, 3, 3), -np.einsum('ik,l->kli', inverse, x))
+    assert np.allclose((X @ b).der.reshape(3, 3, 3), np.einsum('ik,l->kli', np.eye(3), b))
+    assert np.allclose(X.T.der.reshape(3, 3, 3, 3), np.einsum('il,jk->klij', np.eye(3), np.eye(3)))
+    assert np.allclose(np.transpose(X).val, A.T)
+
+    # the right-hand side can be differentiable too, as a vector or as a matrix
+    B = AD(b, der=np.eye(3))
+    assert np.allclose(np.linalg.solve(A, B).der, inverse.T)
+    B = AD(np.stack([b, 2 * b], axis=1), n_vars=1, idx=0)
+    assert np.allclose(np.linalg.solve(A, B).der[0], inverse @ np.ones((3, 2)))
+
+
+def test_differentiate_matrix_function():
+    A = np.array([[2., 1.], [0.5, 3.]])
+
+    def f(M, v):
+        return np.sum(np.linalg.inv(M) @ v), np.linalg.det(M @ M.T)
+
+    jacobian = differentiate(f)(A, np.array([1., 2.]))
+    h = 1e-6
+    numeric = np.array([(np.array(f(A + h, np.array([1., 2.]))) - np.array(f(A - h, np.array([1., 2.])))) / (2 * h),
+                        (np.array(f(A, np.array([1., 2.]) + h)) - np.array(f(A, np.array([1., 2.]) - h))) / (2 * h)]).T
+    assert jacobian.shape == (2, 2)
+    assert np.allclose(jacobian, numeric, rtol=1e-5)
+
+
+def test_value_and_jacobian():
+    def f(x, y):
+        return sin(x) * y, x + y, 3
+
+    value, jacobian = value_and_jacobian(f)(0.5, 2)
+    assert np.allclose(value, [np.sin(0.5) * 2, 2.5, 3])
+    assert np.array_equal(jacobian, differentiate(f)(0.5, 2))
+
+    value, jacobian = value_and_jacobian(lambda x: x ** 2)(x=np.array([1., 2.]))
+    assert np.array_equal(value, [1, 4])
+    assert np.array_equal(jacobian, [[2, 4]])
+
+    value, jacobian = value_and_jacobian(f, batch=True)([0.1, 0.2], 2)
+    assert value.shape == (3, 2)
+    assert np.array_equal(jacobian, differentiate(f, batch=True)([0.1, 0.2], 2))
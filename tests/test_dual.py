@@ -0,0 +1,71 @@
+import pytest
+from autodiffcc.ADmath import *
+from autodiffcc.core import AD, differentiate
+from autodiffcc.dual import Dual
+
+
+def test_dual_operators():
+    x = Dual(3, (1, 0))
+    y = Dual(4, (0, 1))
+    f = (x * y + x / y - y ** 2 + 2 ** x - 1 / x) * (-x) + 5 - y + x ** y - (2 - x)
+    assert isinstance(f, Dual)
+    assert isinstance(f.val, float)
+    # compare to the AD derivative
+    g = differentiate(lambda x, y: (x * y + x / y - y ** 2 + 2 ** x - 1 / x) * (-x) + 5 - y + x ** y - (2 - x))
+    assert np.allclose(f.der, g(np.array([3.]), np.array([4.]))[0])
+    assert f.val == pytest.approx(-(12 + 0.75 - 16 + 8 - 1 / 3) * 3 + 5 - 4 + 81 + 1)
+
+
+def test_dual_comparisons():
+    x = Dual(3, (1,))
+    y = Dual(4, (1,))
+    assert x == 3
+    assert x < y
+    assert x <= 3
+    assert y > x
+    assert y >= 4
+
+
+def test_dual_promotes_to_ad():
+    x = Dual(2, (1, 0))
+    f = x * np.array([1., 2.])
+    assert isinstance(f, AD)
+    expected = AD(2, der=[1, 0]) * np.array([1., 2.])
+    assert np.allclose(f.val, expected.val)
+    assert np.allclose(f.der, expected.der)
+    assert isinstance(np.array([1., 2.]) + x, AD)
+    g = AD(np.array([1., 2.]), n_vars=2, idx=1) * x
+    assert isinstance(g, AD)
+    assert np.allclose(g.val, [2, 4])
+
+
+def test_dual_matches_numpy_semantics():
+    x = Dual(0, (1,))
+    # division by zero and powers without a real result give inf and nan like AD
+    with np.errstate(divide='ignore', invalid='ignore'):
+        assert np.isinf((1 / x).val)
+        assert np.isinf((x ** -1).val)
+        assert np.isnan((Dual(-8, (1,)) ** (1 / 3)).val)
+        assert np.isinf(arcsin(Dual(1, (1,))).der).all()
+    # the derivative with respect to the exponent vanishes where the base is 0
+    assert (x ** Dual(3, (0,))).der == (0.0,)
+    assert (0 ** Dual(3, (1,))).der == (0.0,)
+    # exp is not evaluated where it would overflow a Python float
+    assert logistic(Dual(-800, (1,))).val == 0
+
+
+def test_differentiate_uses_dual_for_scalars():
+    def f(x, y, z):
+        return (sin(x * y) + cos(z) * tan(x) + exp(y) / sqrt(z) + arctan(x) + sinh(y) * cosh(z)
+                + tanh(x * z) + logistic(y) + log(z) + log(x, 2) + arcsin(x / 5) * arccos(y / 5)), x * y, 3
+
+    def is_dual(x, y, z):
+        assert isinstance(x, Dual)
+        return x * y * z
+
+    differentiate(is_dual)(1, 2, 3)
+    scalar = differentiate(f)(1.2, 0.7, 2.5)
+    vector = differentiate(f)(np.array([1.2]), np.array([0.7]), np.array([2.5]))
+    assert scalar.shape == (3, 3)
+    assert np.allclose(scalar, vector)
+    assert np.allclose(differentiate(lambda x: x ** 3)(2), [[12]])
@@ -0,0 +1,94 @@
+import pytest
+from autodiffcc.ADmath import *
+from autodiffcc.core import differentiate
+from autodiffcc.hyperdual import HyperDual, hessian
+
+
+def test_hyperdual_init():
+    x = HyperDual(3, n_vars=2, idx=1)
+    assert np.array_equal(x.der, [0, 1])
+    assert np.array_equal(x.hess, np.zeros((2, 2)))
+    with pytest.raises(ValueError):
+        HyperDual(3, der=[1], n_vars=1, idx=0)
+    with pytest.raises(KeyError):
+        HyperDual(3, n_vars=1)
+
+
+def test_hyperdual_operators():
+    def f(x, y):
+        return (x * y + x / y - y ** 2 + 2 ** x - 1 / x) * (-x) + 5 - y + x ** y
+
+    hess = hessian(f)(1.5, 2.5)
+    # compare to central differences of the forward mode gradient
+    h = 1e-6
+    dfdx = differentiate(f)
+    numeric = np.array([(dfdx(1.5 + h, 2.5) - dfdx(1.5 - h, 2.5))[0] / (2 * h),
+                        (dfdx(1.5, 2.5 + h) - dfdx(1.5, 2.5 - h))[0] / (2 * h)])
+    assert np.allclose(hess, numeric, atol=1e-5)
+    assert np.allclose(hess, hess.T)
+
+
+def test_hyperdual_pow_zero_base():
+    x = HyperDual(0, n_vars=2, idx=0)
+    y = HyperDual(3, n_vars=2, idx=1)
+    f = x ** y
+    assert f.val == 0
+    assert np.array_equal(f.der, [0, 0])
+    assert np.array_equal(f.hess, np.zeros((2, 2)))
+    assert np.array_equal((0 ** y).der, [0, 0])
+
+
+def test_hessian_elementary_functions():
+    # second derivatives of each elementary function at a point in its domain
+    cases = [(cos, 0.7, -np.cos(0.7)),
+             (sin, 0.7, -np.sin(0.7)),
+             (tan, 0.7, 2 * np.tan(0.7) / np.cos(0.7) ** 2),
+             (exp, 0.7, np.exp(0.7)),
+             (sqrt, 0.7, -0.25 * 0.7 ** -1.5),
+             (arcsin, 0.7, 0.7 / (1 - 0.49) ** 1.5),
+             (arccos, 0.7, -0.7 / (1 - 0.49) ** 1.5),
+             (arctan, 0.7, -1.4 / (1 + 0.49) ** 2),
+             (sinh, 0.7, np.sinh(0.7)),
+             (cosh, 0.7, np.cosh(0.7)),
+             (tanh, 0.7, -2 * np.tanh(0.7) / np.cosh(0.7) ** 2),
+             (logistic, 0.7, np.exp(-0.7) * (np.exp(-0.7) - 1) / (1 + np.exp(-0.7)) ** 3),
+             (lambda x: log(x), 0.7, -1 / 0.49),
+             (lambda x: log(x, 2), 0.7, -1 / (0.49 * np.log(2)))]
+    for func, value, expected in cases:
+        assert np.allclose(hessian(func)(value), [[expected]])
+
+
+def test_hessian_vector_function_and_inputs():
+    def f(x, y):
+        return x ** 2 * y, sin(x) + y, 3
+
+    hess = hessian(f)(1, 2)
+    assert hess.shape == (3, 2, 2)
+    assert np.allclose(hess[0], [[4, 2], [2, 0]])
+    assert np.allclose(hess[1], [[-np.sin(1), 0], [0, 0]])
+    assert np.allclose(hess[2], 0)
+
+    x = np.array([1., 2., 3.])
+    hess = hessian(lambda x, y: x ** 2 * y)(x, 2)
+    assert hess.shape == (2, 2, 3)
+    assert np.allclose(hess[0, 0], 4)
+    assert np.allclose(hess[0, 1], 2 * x)
+    assert np.allclose(hessian(lambda x: 2)(1), [[0]])
+
+
+def test_hyperdual_abs_and_numpy():
+    def f(x, y):
+        return abs(x - 2) * y ** 2 + np.sin(x * y)
+
+    hess = hessian(f)(0.7, 1.3)
+    assert np.allclose(hess, [[-1.3 ** 2 * np.sin(0.91), 2 * -1.3 - 0.91 * np.sin(0.91) + np.cos(0.91)],
+                              [2 * -1.3 - 0.91 * np.sin(0.91) + np.cos(0.91), 2 * 1.3 - 0.7 ** 2 * np.sin(0.91)]])
+    # a function accepted by differentiate is accepted by hessian
+    A = np.array([[2., 1.], [1., 3.]])
+    x = np.array([1., 2.])
+    g = lambda x: np.sum(np.sin(x) * x) + x @ A @ x + np.dot(x, x) + np.mean(A @ x)
+    assert differentiate(g)(x).shape == (1, 1)
+    assert np.allclose(hessian(g)(x), [[np.sum(2 * np.cos(x) - x * np.sin(x)) + 2 * np.sum(A) + 4]])
+    X = HyperDual(A, n_vars=1, idx=0)
+    assert np.allclose((X @ X).hess, [[2 * np.ones((2, 2)) @ np.ones((2, 2))]])
+    assert np.allclose(np.transpose(X @ A).der, [(np.ones((2, 2)) @ A).T])
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+# root of the repository, so that the subprocesses import this checkout of autodiffcc
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+
+def test_import_defers_optional_modules():
+    loaded = run_python("import sys, autodiffcc; "
+                        "print(*sorted(m for m in ('matplotlib', 'scipy', 'autodiffcc.Equation') if m in sys.modules))")
+    assert loaded.stdout.split() == []
+
+    loaded = run_python("import sys, autodiffcc.parser; "
+                        "print(*sorted(m for m in ('matplotlib', 'scipy') if m in sys.modules))")
+    assert loaded.stdout.split() == []
+
+
+def test_equation_plugins_load_on_first_expression():
+    loaded = run_python("import sys\n"
+                        "from autodiffcc.Equation import Expression\n"
+                        "print('scipy' in sys.modules)\n"
+                        "print(Expression('2 * x + c')(1) == 2 + 299792458)\n"
+                        "print('scipy' in sys.modules)")
+    assert loaded.stdout.split() == ['False', 'True', 'True']
+
+
+
+def test_equation_plugins_load_once_across_threads_and_failures():
+    # a plugin whose extension fails is reported and skipped, and the threads all parse against full tables
+    loaded = run_python("import sys, types\n"
+                        "from concurrent.futures import ThreadPoolExecutor\n"
+                        "from autodiffcc.Equation import core, Expression\n"
+                        "broken = types.ModuleType('broken')\n"
+                        "broken.equation_extend = lambda: 1 / 0\n"
+                        "sys.modules['autodiffcc.Equation.broken'] = broken\n"
+                        "core.plugins.append('broken')\n"
+                        "with ThreadPoolExecutor(max_workers=8) as pool:\n"
+                        "    values = list(pool.map(lambda i: Expression('sin(x) + {}'.format(i), ['x'])(0), range(16)))\n"
+                        "print(values == list(range(16)), core.load.loaded)")
+    assert loaded.stdout.split() == ['True', 'True']
+    assert loaded.stderr.count('Was unable to load broken') == 1
@@ -1,7 +1,8 @@
 import pytest
+import numpy as np
 from autodiffcc.ADmath import *
 from autodiffcc.core import AD
-from autodiffcc.parser import expressioncc
+from autodiffcc.parser import expressioncc, cache_clear, cache_info, CACHE_SIZE
 
 def test_log():
     fn = expressioncc('3 * log(x,2) + sin(7)', ['x']).get_fn()
@@ -21,4 +22,108 @@ def test_multi_var():
     y = AD(3, der = [0, 1])
     t1 = fn(x,y)
     assert t1.val == pytest.approx(2.1411200080598674)
-    assert t1.der.tolist() == [pytest.approx(0.36067376), pytest.approx(-0.9899925)] 
\ No newline at end of file
+    assert t1.der.tolist() == [pytest.approx(0.36067376), pytest.approx(-0.9899925)] 
+
+def test_compiled_call():
+    from autodiffcc.Equation import Expression
+
+    fn = Expression('x * y + sin(x) - y ^ 2', ['x', 'y'])
+    assert fn(0.3, 0.4) == pytest.approx(0.3 * 0.4 + np.sin(0.3) - 0.4 ** 2)
+    assert fn(0.3, y=0.4) == fn(y=0.4, x=0.3) == fn(0.3, 0.4)
+    t1 = fn(AD(0.3, der=[1, 0]), AD(0.4, der=[0, 1]))
+    assert t1.der.tolist() == [pytest.approx(0.4 + np.cos(0.3)), pytest.approx(0.3 - 0.8)]
+    # constants are used for variables that are not passed
+    assert Expression('2 * pi')() == pytest.approx(2 * np.pi)
+    # in-place operators rebuild the cached function
+    fn = Expression('x')
+    assert fn(1) == 1
+    fn += 2
+    fn **= 3
+    fn -= 'z'
+    assert fn(1, 2) == 25
+    # long expressions compile to flat code
+    assert Expression(' + '.join(['x'] * 1000))(1) == 1000
+
+def test_bind():
+    from autodiffcc.Equation import Expression
+
+    fn = Expression('a * x + y ^ 2 + pi', ['x', 'y'])
+    fn['a'] = 2
+    f = fn.bind(['y', 'x'])
+    assert f(3, 1) == pytest.approx(2 + 9 + np.pi)
+    # preset variables and constants are resolved when binding
+    fn['a'] = 5
+    assert f(3, 1) == pytest.approx(2 + 9 + np.pi)
+    assert fn.bind(['x', 'y', 'a'])(1, 3, 0) == pytest.approx(9 + np.pi)
+    # without argorder the variables of the Expression are used
+    assert fn.bind()(1, 3, 0, 1) == pytest.approx(9 + 1)
+    t1 = fn.bind(['x', 'y'])(AD(1, der=[1, 0]), AD(3, der=[0, 1]))
+    assert t1.der.tolist() == [pytest.approx(5), pytest.approx(6)]
+    with pytest.raises(TypeError):
+        f(3)
+    with pytest.raises(TypeError, match="'y' not defined"):
+        fn.bind(['x'])
+    with pytest.raises(ValueError, match="Duplicate variable names"):
+        fn.bind(['x', 'x', 'y'])
+
+def test_parse_cache():
+    cache_clear()
+    fn1 = expressioncc('3 * log(x,2) + sin(y)', ['x', 'y']).get_fn()
+    fn2 = expressioncc('  3 * log(x,2)   + sin(y) ', ['x', 'y']).get_fn()
+    assert cache_info().hits == 1 and cache_info().misses == 1 and cache_info().currsize == 1
+    assert fn1(4, 3) == fn2(4, 3) == pytest.approx(6 + np.sin(3))
+    # the variable order is part of the key
+    fn3 = expressioncc('3 * log(x,2) + sin(y)', ['y', 'x']).get_fn()
+    assert cache_info().misses == 2
+    assert fn3(3, 4) == pytest.approx(6 + np.sin(3))
+    # each expressioncc gets its own copy of the cached function
+    fn2 += 1
+    assert fn1(4, 3) == pytest.approx(6 + np.sin(3))
+    assert expressioncc('3 * log(x,2) + sin(y)', ['x', 'y']).get_fn()(4, 3) == pytest.approx(6 + np.sin(3))
+    # least recently used expressions are evicted
+    for i in range(CACHE_SIZE):
+        expressioncc('x + {}'.format(i), ['x'])
+    assert cache_info().currsize == CACHE_SIZE
+    expressioncc('x + 0', ['x'])
+    assert cache_info().hits == 3
+    expressioncc('3 * log(x,2) + sin(y)', ['x', 'y'])
+    assert cache_info().hits == 3
+    cache_clear()
+    assert cache_info().currsize == 0 and cache_info().hits == 0
+
+def test_parse_cache_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache_clear()
+    lines = ['x * {} + sin(x)'.format(i % 10) for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(lambda line: expressioncc(line, ['x']).get_fn()(0.5), lines))
+    assert values == [pytest.approx(0.5 * (i % 10) + np.sin(0.5)) for i in range(200)]
+    assert cache_info().hits + cache_info().misses == 200
+    assert cache_info().currsize == 10
+
+def test_primitive():
+    from autodiffcc.Equation import Expression
+
+    @primitive(derivative=lambda x: 2 * x)
+    def squared(x):
+        return x * x
+
+    @primitive(derivative=lambda x, y: (y, x))
+    def times(x, y):
+        return x * y
+
+    t1 = expressioncc('squared(x) + 1', ['x']).get_fn()(AD(4, n_vars=1))
+    assert t1.val == pytest.approx(17)
+    assert t1.der == pytest.approx(8)
+    fn = Expression('times(x, squared(y))', ['x', 'y'])
+    t2 = fn(AD(2, der=[1, 0]), AD(3, der=[0, 1]))
+    assert t2.val == pytest.approx(18)
+    assert t2.der.tolist() == [pytest.approx(9), pytest.approx(12)]
+    assert str(fn) == '\\operatorname{times}\\left(x,\\operatorname{squared}\\left(y\\right)\\right)'
+    # the commas of functions with several arguments are left alone, only those of log are rewritten
+    t3 = expressioncc('times(x, y) + log(squared(x), 2)', ['x', 'y']).get_fn()(AD(2, der=[1, 0]), AD(3, der=[0, 1]))
+    assert t3.val == pytest.approx(8)
+    assert t3.der.tolist() == [pytest.approx(3 + 1 / np.log(2)), pytest.approx(2)]
+    with pytest.raises(SyntaxError, match='Invalid number of arguments for times'):
+        expressioncc('times(x) + 1', ['x'])
@@ -0,0 +1,141 @@
+import pytest
+from autodiffcc.ADmath import *
+from autodiffcc.core import differentiate
+from autodiffcc.reverse import Node, gradient, vjp
+
+
+def test_node_operators():
+    tape = []
+    x = Node(3, tape)
+    y = Node(4, tape)
+    f = (x * y + x / y - y ** 2 + 2 ** x - 1 / x) * (-x) + 5 - y
+    f.backward()
+    assert f.val == pytest.approx(-(12 + 0.75 - 16 + 8 - 1 / 3) * 3 + 5 - 4)
+    # compare to the forward mode derivative
+    dfdx = differentiate(lambda x, y: (x * y + x / y - y ** 2 + 2 ** x - 1 / x) * (-x) + 5 - y)
+    assert np.allclose([x.adj, y.adj], dfdx(3, 4))
+
+
+def test_node_pow():
+    tape = []
+    x = Node(3, tape)
+    y = Node(5, tape)
+    f = x ** y
+    f.backward()
+    assert f.val == 243
+    assert x.adj == pytest.approx(405)
+    assert y.adj == pytest.approx(266.96278615)
+
+    tape = []
+    x = Node(0, tape)
+    y = Node(5, tape)
+    f = x ** y
+    f.backward()
+    assert x.adj == 0
+    assert y.adj == 0
+
+
+def test_node_comparisons():
+    x = Node(3)
+    y = Node(4)
+    assert x == 3
+    assert x < y
+    assert x <= 3
+    assert y > x
+    assert y >= 4
+    assert np.array_equal(Node(np.array([1., 5.])) > np.array([2., 2.]), [False, True])
+    assert np.array_equal(Node(np.array([1., 5.])) <= Node(np.array([1., 2.])), [True, False])
+
+
+def test_gradient_matches_differentiate():
+    def f(x, y, z):
+        return (sin(x * y) + cos(z) * tan(x) + exp(y) / sqrt(z) + arctan(x) + sinh(y) * cosh(z)
+                + tanh(x * z) + logistic(y) + log(z) + log(x, 2) + arcsin(x / 5) * arccos(y / 5))
+
+    grad = gradient(f)(1.2, 0.7, 2.5)
+    assert grad.shape == (3,)
+    assert np.allclose(grad, differentiate(f)(1.2, 0.7, 2.5)[0])
+    assert np.allclose(gradient(f)(x=1.2, y=0.7, z=2.5), grad)
+
+
+def test_gradient_vector_inputs():
+    def f(x, y):
+        return x * y + sin(x)
+
+    x = np.array([1, 2, 3])
+    y = np.array([2, 1, 4])
+    assert np.allclose(gradient(f)(x, y), differentiate(f)(x, y)[0])
+    # through a reduction the gradient keeps one entry per input entry, which differentiate sums
+    grad = gradient(lambda x, y: np.sum(x * x) * y)(x, 3.)
+    assert np.allclose(grad, [6, 12, 18, 14])
+    assert np.allclose(differentiate(lambda x, y: np.sum(x * x) * y)(x, 3.), [[grad[:3].sum(), grad[3]]])
+
+
+def test_gradient_many_inputs():
+    def f(*xs):
+        total = 0
+        for i, x in enumerate(xs):
+            total = total + (i + 1) * x ** 2
+        return total
+
+    values = np.linspace(-1, 1, 200)
+    assert np.allclose(gradient(f)(*values), 2 * np.arange(1, 201) * values)
+
+
+def test_gradient_constant_and_vector_functions():
+    assert np.allclose(gradient(lambda x, y: 2)(1, 2), [0, 0])
+    with pytest.raises(ValueError):
+        gradient(lambda x, y: (x, y))(1, 2)
+    with pytest.raises(KeyError):
+        gradient(lambda x, y: x * y)(1)
+
+
+def test_vjp():
+    def f(x, y, z):
+        return x * sin(y) + z ** 2, exp(x * z), 4, y / x
+
+    x = [1.5, 0.3, -0.8]
+    u = [0.2, -1.0, 3.0, 0.5]
+    assert np.allclose(vjp(f, x, u), u @ differentiate(f)(*x))
+    assert np.allclose(vjp(f, {'z': -0.8, 'y': 0.3, 'x': 1.5}, u), u @ differentiate(f)(*x))
+    assert np.allclose(vjp(lambda x, y: x * y, [2, 3], 2), [6, 4])
+    assert np.allclose(vjp(lambda x, y: (x, x), [2, 3], [1, 1]), [2, 0])
+    with pytest.raises(ValueError):
+        vjp(f, x, [1, 2])
+
+
+def test_vjp_vector_inputs():
+    def f(x, y):
+        return x * y, sin(x)
+
+    x = np.array([1., 2., 3.])
+    y = np.array([2., 1., 4.])
+    assert np.allclose(vjp(f, [x, y], [1, 0]), gradient(lambda x, y: x * y)(x, y))
+
+
+def test_node_abs_and_numpy():
+    def numerical_gradient(f, x, h=1e-6):
+        return np.array([(f(x + h * e) - f(x - h * e)) / (2 * h) for e in np.eye(len(x))])
+
+    A = np.array([[1., 2., 0.], [0., 1., 3.]])
+    x = np.array([1., 2., 3.])
+    for f in [lambda x: np.sum((A @ x) ** 2),
+              lambda x: np.sum(abs(x - 2.5)) + np.sum(np.sin(x)),
+              lambda x: x @ x + np.mean(x),
+              lambda x: np.sum(np.transpose(A * x) @ np.ones(2)),
+              lambda x: np.dot(x, x) * 2,
+              lambda x: np.ones(2) @ (A @ x),
+              lambda x: np.sum(np.exp(x) / x)]:
+        assert np.allclose(gradient(f)(x), numerical_gradient(f, x), atol=1e-5)
+
+    # matrix valued nodes
+    tape = []
+    X = Node(np.array([[1., 2.], [3., 4.]]), tape)
+    B = Node(np.array([[0., 1.], [1., 1.]]), tape)
+    np.sum(X @ B).backward()
+    assert np.allclose(X.adj, np.ones((2, 2)) @ B.val.T)
+    assert np.allclose(B.adj, X.val.T @ np.ones((2, 2)))
+    assert np.allclose(vjp(lambda x: A @ x, [x], [np.array([1., 2.])]), np.array([1., 2.]) @ A)
+    assert abs(Node(-3.)).val == 3
+    with pytest.raises(TypeError):
+        np.linalg.det(X)
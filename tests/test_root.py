@@ -1,6 +1,8 @@
 import pytest
 import inspect
-from autodiffcc.root import find_root, _check_interval
+import sys
+import matplotlib.pyplot as plt
+from autodiffcc.root import find_root, find_root_batch, plot_function, _check_interval
 from autodiffcc.ADmath import *
 
 
@@ -191,6 +193,16 @@ def test_bisect():
     assert np.allclose(this_root, [0.0, 0.0])
 
 
+def test_bisection_evaluations():
+    def f(x, y, z):
+        return x ** 3 + y ** 3 + z ** 3 - 1.11
+
+    root, n_calls = find_root(function=f, method='bisection', interval=[[-1, 1.5]] * 3, full_output=True)
+    assert np.isclose(f(*root), 0., atol=1e-8)
+    # the 8 corners once, then one middle per iteration
+    assert n_calls < 8 + 60
+
+
 def test_bisection_no_solution():
     def f(x, y):
         return x + y
@@ -223,9 +235,41 @@ def test_bisection_zero_interval():
 
     assert np.isclose(f1var(1), -6.)
 
+    # the solver does not plot, so a zero interval only has no change in sign
+    with pytest.raises(Exception, match="No change in sign, please try different intervals"):
+        find_root(function=f1var, method='bisect', interval=[0, 0], max_iter=1)
+
     with pytest.raises(Warning,
                        match="Please choose a non-zero interval to see informative plot."):
-        find_root(function=f1var, method='bisect', interval=[0, 0], max_iter=1)
+        plot_function(f1var, interval=[0, 0])
+
+
+def test_bisection_headless(monkeypatch, capsys):
+    def fail(*args, **kwargs):
+        raise AssertionError("the solver must not plot")
+
+    monkeypatch.setattr(plt, 'subplots', fail)
+    monkeypatch.setattr(plt, 'show', fail)
+    calls = []
+
+    def f1var(x):
+        calls.append(x)
+        return (x + 2) * (x - 3)
+
+    this_root = find_root(function=f1var, method='bisect', interval=[2, 4])
+    assert np.isclose(this_root, 3.0)
+    assert capsys.readouterr().out == ''
+    # only the corners and midpoints are evaluated, never a sampled grid
+    assert all(np.ndim(x) == 0 for x in calls)
+
+
+def test_plot_function(monkeypatch):
+    monkeypatch.setattr(plt, 'show', lambda: None)
+    ax = plot_function(lambda x: (x + 2) * (x - 3), [-5, 5], num=50)
+    assert len(ax.lines[0].get_xdata()) == 50
+    plt.close('all')
+    with pytest.raises(Exception, match="Only functions of one variable can be plotted."):
+        plot_function(lambda x, y: x + y, [[-1, 1], [-1, 1]])
 
 
 def test_newton_fourier_scalar():
@@ -275,3 +319,186 @@ def test_invalid_method():
     with pytest.raises(ValueError, match="Invalid method supplied. See documentation for accepted methods."):
         find_root(function=lambda x: x ** 2 + 1, method='n', interval=[-1, 1])
 
+
+def test_find_root_batch():
+    a = np.linspace(1, 10, 50)
+    roots, iterations, converged = find_root_batch(lambda x, a: exp(x) - a * x - 1, np.full(50, 3.0), args=(a,))
+    assert converged.all()
+    assert np.allclose(exp(roots) - a * roots - 1, 0, atol=1e-8)
+    assert (iterations > 0).all()
+    for i in [0, 17, 49]:
+        assert np.isclose(roots[i], find_root(lambda x: exp(x) - a[i] * x - 1, start_values=3.0))
+
+    # parameters broadcast with the start values, and solved problems take no steps
+    roots, iterations, converged = find_root_batch(lambda x, a: x ** 2 - a, [[1], [2]], args=([1, 4, 9],))
+    assert roots.shape == (2, 3)
+    assert np.allclose(roots, [[1, 2, 3], [1, 2, 3]])
+    assert iterations[0, 0] == 0
+
+
+def test_find_root_batch_no_solution():
+    roots, iterations, converged = find_root_batch(lambda x, b: x ** 2 + b, [1.5, 2.0, 0.5], args=([1, -4, -0.25],),
+                                                   max_iter=50)
+    assert converged.tolist() == [False, True, True]
+    assert iterations[0] == 50
+    assert np.allclose(roots[1:], [2, 0.5])
+
+    # a zero derivative stops the problem without raising
+    roots, iterations, converged = find_root_batch(lambda x: x ** 2 + 1, [0.0, 1.5], max_iter=10)
+    assert not converged.any()
+    assert iterations.tolist() == [0, 10]
+
+
+def test_newton_one_evaluation_per_iteration():
+    calls = []
+
+    def f(x, y):
+        calls.append(1)
+        return x ** 2 - y, y - 4
+
+    this_root = find_root(function=f, method='newton', start_values=[1, 1])
+    assert np.allclose(this_root, [2, 4])
+
+    # count the Newton steps needed to reach the same threshold
+    values = np.array([1.0, 1.0])
+    n_iterations = 0
+    while np.sum(np.abs([values[0] ** 2 - values[1], values[1] - 4])) >= 1e-8:
+        values = values - np.linalg.solve([[2 * values[0], -1], [0, 1]], [values[0] ** 2 - values[1], values[1] - 4])
+        n_iterations += 1
+    # one evaluation at the start values, then one per iteration
+    assert len(calls) == n_iterations + 1
+
+
+def test_newton_fourier_evaluations():
+    calls = []
+
+    def f(x, y, z):
+        calls.append(hasattr(x, 'der'))
+        return x + y + z - 6, x - 2 * y + 3, z ** 2 - 9
+
+    this_root = find_root(function=f, method='newton-fourier', interval=[[0.5, 0.6], [1.5, 1.6], [2, 2.1]])
+    # each iteration evaluates the Jacobian and the value at x in one pass, and the value at z
+    assert calls.count(True) == calls.count(False)
+    assert np.allclose(f(*this_root), 0, atol=1e-6)
+
+
+def test_newton_linear_solvers(monkeypatch):
+    def f(x, y, z):
+        return x + y + z - 6, x - 2 * y + 3, z ** 2 - 9
+
+    for method in ['newton', 'n-f']:
+        kwargs = {'start_values': [0.5, 1.5, 2]} if method == 'newton' else {'interval': [[0.5, 0.6], [1.5, 1.6], [2, 2.1]]}
+        lu_root = find_root(function=f, method=method, **kwargs)
+        pinv_root = find_root(function=f, method=method, linear_solver='pinv', **kwargs)
+        chord_root = find_root(function=f, method=method, reuse_jacobian=3, **kwargs)
+        assert np.allclose(lu_root, pinv_root)
+        assert np.allclose(lu_root, chord_root)
+        assert np.allclose(f(*lu_root), 0, atol=1e-6)
+
+    # a singular Jacobian falls back to least squares
+    def g(x, y):
+        return x + y - 2, 2 * x + 2 * y - 4
+
+    assert np.allclose(find_root(function=g, method='newton', start_values=[0, 0]), [1, 1])
+
+    with pytest.raises(ValueError, match="Invalid linear_solver supplied"):
+        find_root(function=f, method='newton', start_values=[1, 1, 1], linear_solver='qr')
+    with pytest.raises(ValueError, match="reuse_jacobian must be a positive integer."):
+        find_root(function=f, method='newton', start_values=[1, 1, 1], reuse_jacobian=0)
+
+    # without SciPy the steps are solved with numpy alone
+    monkeypatch.setitem(sys.modules, 'scipy.linalg', None)
+    assert np.allclose(find_root(function=f, method='newton', start_values=[0.5, 1.5, 2]), lu_root)
+    assert np.allclose(find_root(function=g, method='newton', start_values=[0, 0]), [1, 1])
+
+
+def test_newton_reuse_jacobian_evaluations():
+    n_jacobians = []
+
+    def f(x, y):
+        if hasattr(x, 'der'):
+            n_jacobians.append(1)
+        return x ** 2 - y, y - 4
+
+    find_root(function=f, method='newton', start_values=[1.5, 3.5], reuse_jacobian=4)
+    chord_jacobians = len(n_jacobians)
+    n_jacobians.clear()
+    find_root(function=f, method='newton', start_values=[1.5, 3.5])
+    assert chord_jacobians < len(n_jacobians)
+
+
+def test_broyden():
+    def f(x, y):
+        return sin(x) + y ** 3 - 1.2, x * y - 0.3
+
+    newton_root = find_root(function=f, method='newton', start_values=[0.3, 0.9])
+    for method in ['broyden', 'broyden-good', 'broyden-bad']:
+        this_root = find_root(function=f, method=method, start_values=[0.3, 0.9])
+        assert np.allclose(this_root, newton_root)
+
+    this_root = find_root(function=lambda x: (x + 2) * (x - 3), method='broyden', start_values=2.5)
+    assert np.allclose(this_root, 3)
+    this_root = find_root(function=f, method='broyden', start_values={'x': 0.3, 'y': 0.9})
+    assert np.allclose(this_root, newton_root)
+
+
+def test_broyden_evaluations():
+    n_calls = {'AD': 0, 'value': 0}
+
+    def f(x, y, z):
+        n_calls['AD' if hasattr(x, 'der') else 'value'] += 1
+        return x + y + z - 6, x - 2 * y + 3, exp(z - 3) - 1
+
+    this_root = find_root(function=f, method='broyden', start_values=[0.5, 1.5, 2])
+    assert np.allclose(this_root, [1, 2, 3])
+    # the Jacobian is only computed at the start values
+    assert n_calls['AD'] == 1
+
+
+def test_broyden_no_solution():
+    with pytest.raises(Exception, match="Broyden did not converge, try increasing max_iter or changing start_values."):
+        find_root(function=lambda x: x ** 2 + 1, method='broyden', start_values=1, max_iter=50)
+
+
+def test_brent():
+    def f1var(x):
+        return (x + 2) * (x - 3)
+
+    this_root, n_evaluations = find_root(function=f1var, method='brent', interval=[0, 5], full_output=True)
+    assert np.allclose(this_root, 3.0)
+    assert n_evaluations < 20
+
+    # brent is the default when only an interval is given, in any format accepted by bisection
+    assert np.allclose(find_root(function=f1var, interval=[-5, 0]), -2.0)
+    assert np.allclose(find_root(function=f1var, interval=[{'x': 0}, {'x': 5}]), 3.0)
+    assert np.allclose(find_root(function=f1var, interval=np.array([0, 5])), 3.0)
+
+    # converges far faster than interval halving on a smooth function
+    this_root, n_evaluations = find_root(function=lambda x: exp(x) - 10 * x, interval=[0, 1], full_output=True,
+                                         threshold=1e-14)
+    assert np.isclose(np.exp(this_root) - 10 * this_root, 0, atol=1e-14)
+    assert n_evaluations < 15
+
+    # roots at the ends of the interval and at 0
+    assert np.allclose(find_root(function=lambda x: x, interval=[0, 1]), 0)
+    assert np.allclose(find_root(function=lambda x: x ** 3, interval=[-1, 2], threshold=1e-30), 0, atol=1e-10)
+
+
+def test_brent_bad_inputs():
+    with pytest.raises(Exception, match="No change in sign, please try a different interval."):
+        find_root(function=lambda x: x ** 2 + 1, method='brent', interval=[-1, 1])
+    with pytest.raises(Exception, match="Brent's method only supports functions of one variable"):
+        find_root(function=lambda x, y: x + y, method='brent', interval=[[-1, 1], [-1, 1]])
+    with pytest.raises(Exception, match="Brent's method only supports functions of one variable"):
+        find_root(function=lambda x: (x, x), method='brent', interval=[-1, 1])
+    with pytest.raises(Exception, match="Brent's method did not converge, try increasing max_iter."):
+        find_root(function=lambda x: x - 0.3, method='brent', interval=[0, 1], max_iter=1)
+
+
+def test_full_output():
+    def f(x, y):
+        return 2 * x + y, x - 1
+
+    this_root, n_evaluations = find_root(function=f, method='newton', start_values=[1, 2], full_output=True)
+    assert np.allclose(this_root, [1, -2])
+    assert n_evaluations == 2
@@ -0,0 +1,114 @@
+import pytest
+from autodiffcc.ADmath import *
+from autodiffcc.core import AD, differentiate
+from autodiffcc.sparse import SparseDer
+
+
+def test_sparse_der_arithmetic():
+    x = SparseDer({0: np.array(1.0)}, 4)
+    y = SparseDer({2: np.array(2.0)}, 4)
+    assert np.array_equal((x + y).toarray(), [1, 0, 2, 0])
+    assert np.array_equal((x - y).toarray(), [1, 0, -2, 0])
+    assert np.array_equal((3 * x - y / 2).toarray(), [3, 0, -1, 0])
+    assert np.array_equal((np.float64(2) * y).toarray(), [0, 0, 4, 0])
+    assert np.array_equal(x + np.ones(4), [2, 1, 1, 1])
+    assert (x * np.ones(3)).shape == (4, 3)
+
+
+def test_sparse_ad_seed():
+    x = AD(3, n_vars=1000, idx=7, sparse=True)
+    assert isinstance(x.der, SparseDer)
+    assert list(x.der.partials) == [7]
+    f = 2 * x + 1
+    assert f.val == 7
+    assert list(f.der.partials) == [7]
+    assert f.der.partials[7] == 2
+
+
+def test_sparse_ad_broadcasting():
+    A = np.array([[1., 2.], [3., 4.]])
+
+    def operations(x):
+        return x + A, A + x, x - A, A - x, x * A, A * x, x / A, A / x, x ** A, A ** x
+
+    # every operator gives a derivative with the shape of the result, constants on either side
+    sparse = operations(AD(2., n_vars=3, idx=1, sparse=True))
+    dense = operations(AD(2., n_vars=3, idx=1))
+    for f, g in zip(sparse, dense):
+        assert f.der.shape == g.der.shape == (3, 2, 2)
+        assert np.allclose(f.der.toarray(), g.der)
+
+
+def test_differentiate_sparse_matches_dense():
+    def f(x, y, z):
+        return (sin(x * y) + cos(z) * tan(x) + exp(y) / sqrt(z) + arctan(x) + sinh(y) * cosh(z)
+                + tanh(x * z) + logistic(y) + log(z) + log(x, 2) + arcsin(x / 5) * arccos(y / 5)
+                + x ** y + 2 ** z - 1 / x - (3 - y)), x * 3, 4
+
+    jacobian = differentiate(f, sparse=True)(1.2, 0.7, 2.5)
+    assert jacobian.shape == (3, 3)
+    assert np.allclose(jacobian.toarray(), differentiate(f)(1.2, 0.7, 2.5))
+    assert jacobian.nnz == 4
+
+
+def test_differentiate_sparse_many_variables():
+    def f(*xs):
+        n = len(xs)
+        return [xs[i - 1] - 2 * xs[i] + xs[(i + 1) % n] ** 2 for i in range(n)]
+
+    values = np.linspace(0, 1, 300)
+    jacobian = differentiate(f, sparse=True)(*values)
+    assert jacobian.nnz == 900
+    assert np.allclose(jacobian.toarray(), differentiate(f)(*values))
+
+
+def test_differentiate_sparse_vector_inputs():
+    def f(x, y):
+        return x * y, y
+
+    x = np.array([1., 2., 3.])
+    jacobian = differentiate(f, sparse=True)(x, x + 1)
+    assert np.allclose(jacobian.toarray(), differentiate(f)(x, x + 1))
+    with pytest.raises(ValueError):
+        differentiate(f, batch=True, sparse=True)(x, x)
+
+
+def test_colour_columns():
+    from autodiffcc.sparse import _colour_columns
+    # tridiagonal pattern needs three colours
+    n = 10
+    rows = np.array([i for i in range(n) for j in (i - 1, i, i + 1) if 0 <= j < n])
+    cols = np.array([j for i in range(n) for j in (i - 1, i, i + 1) if 0 <= j < n])
+    colours = _colour_columns(rows, cols, n)
+    assert colours.max() + 1 == 3
+    for row in range(n):
+        assert len(set(colours[cols[rows == row]])) == np.sum(rows == row)
+    # a diagonal pattern needs a single colour
+    assert np.array_equal(_colour_columns(np.arange(4), np.arange(4), 4), np.zeros(4))
+
+
+def test_differentiate_compress_tridiagonal():
+    def f(*xs):
+        n = len(xs)
+        return [xs[i] if i in (0, n - 1) else xs[i - 1] - 2 * sin(xs[i]) + xs[i + 1] ** 2 for i in range(n)]
+
+    values = np.linspace(0, 1, 200)
+    dfdx = differentiate(f, compress=True)
+    jacobian = dfdx(*values)
+    assert jacobian.shape == (200, 200)
+    assert np.allclose(jacobian.toarray(), differentiate(f)(*values))
+    # the pattern found on the first call is reused at new points
+    assert np.allclose(dfdx(*(values + 1)).toarray(), differentiate(f)(*(values + 1)))
+
+
+def test_differentiate_compress_constant_outputs_and_errors():
+    def f(x, y, z):
+        return x * y, 3, z
+
+    jacobian = differentiate(f, compress=True)(2, 3, 4)
+    assert np.allclose(jacobian.toarray(), [[3, 2, 0], [0, 0, 0], [0, 0, 1]])
+    assert np.allclose(differentiate(lambda x, y: x * y, compress=True)(2, 3).toarray(), [[3, 2]])
+    with pytest.raises(ValueError):
+        differentiate(f, compress=True)(np.ones(2), 3, 4)
+    with pytest.raises(ValueError):
+        differentiate(f, batch=True, compress=True)(2, 3, 4)
@@ -0,0 +1,52 @@
+import pytest
+from autodiffcc.ADmath import *
+from autodiffcc.core import differentiate
+from autodiffcc.trace import compile_jacobian
+
+
+def f(x, y, z):
+    f1 = (sin(x * y) + cos(z) * tan(x) + exp(y) / sqrt(z) + arctan(x) + sinh(y) * cosh(z)
+          + tanh(x * z) + logistic(y) + log(z) + log(x, 2) + arcsin(x / 5) * arccos(y / 5))
+    f2 = x ** y + 2 ** z - 1 / x + x ** 0.5 + z ** -1 - x ** 3
+    return f1, f2
+
+
+def test_compile_jacobian_matches_differentiate():
+    jacobian = compile_jacobian(f, [1.0, 2.0, 3.0])
+    dfdx = differentiate(f)
+    rng = np.random.default_rng(0)
+    # differentiate uses Dual numbers for scalar inputs, which round differently from numpy
+    for values in rng.uniform(0.1, 2, size=(50, 3)):
+        assert np.allclose(jacobian(*values), dfdx(*values), rtol=1e-12, atol=0)
+    assert np.allclose(jacobian(x=0.5, y=1.5, z=0.3), dfdx(x=0.5, y=1.5, z=0.3), rtol=1e-12, atol=0)
+
+
+def test_compile_jacobian_vector_inputs():
+    x = np.linspace(0.1, 1, 20)
+    jacobian = compile_jacobian(f, {'x': x, 'y': x, 'z': x})
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0.1, 2, size=(3, 20))
+    assert np.array_equal(jacobian(*values), differentiate(f)(*values))
+    # scalar and vector inputs mixed broadcast the derivatives of the scalar ones
+    jacobian = compile_jacobian(f, [x, 1.5, 2.0])
+    assert np.array_equal(jacobian(values[0], 0.5, 1.2), differentiate(f)(values[0], 0.5, 1.2))
+
+
+def test_compile_jacobian_scalar_and_constant_functions():
+    def g(x, y):
+        return x * y ** 2
+
+    jacobian = compile_jacobian(g, [1, 1])
+    assert np.array_equal(jacobian(3, 2), differentiate(g)(3, 2))
+    assert np.allclose(compile_jacobian(lambda x: 2, [1])(5), 0)
+    assert np.allclose(compile_jacobian(lambda x, y: (x, 3), [1, 2])(5, 6), [[1, 0], [0, 0]])
+
+
+def test_compile_jacobian_bad_inputs():
+    jacobian = compile_jacobian(f, [1.0, 2.0, 3.0])
+    with pytest.raises(KeyError):
+        jacobian(1.0, 2.0)
+    with pytest.raises(KeyError):
+        jacobian(x=1.0, y=2.0)
+    with pytest.raises(ValueError):
+        jacobian(np.ones(2), 2.0, 3.0)